@@ -4,139 +4,377 @@ Dekho videos mein cars, trucks ke around boxes!
 """
 import cv2
 import sys
+import time
+import numpy as np
+import heapq
+import queue
+import threading
+from collections import OrderedDict
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from tqdm import tqdm
 
 # Add project to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import Config
 from vehicle_detector import VehicleDetector
+from video_io import open_capture, get_video_info, create_video_writer
+from _kernels import draw_boxes, fill_rects, build_palette
 
-print("\n" + "="*70)
-print("🚗 QUICK VIDEO PROCESSOR - Creating Annotated Videos")
-print("="*70 + "\n")
 
-# Initialize detector
-print("🔧 Loading AI model (YOLOv8)...")
-detector = VehicleDetector()
-print("✅ Model loaded!\n")
+# Color based on vehicle type
+_COLORS = {
+    'car': (0, 255, 0),      # Green
+    'bus': (0, 0, 255),      # Red
+    'truck': (255, 0, 255),  # Magenta
+    'motorcycle': (255, 0, 0),  # Blue
+    'bicycle': (0, 255, 255)    # Yellow
+}
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
 
-# Find videos
-videos = list(Config.VIDEO_DIR.glob("*.mp4"))
+# Per-process state, populated by init_worker() in each pool worker
+detector = None
+cuda_stream = None
+progress_q = None
+CLASS_NAMES = {}
+CLASS_COLORS = {}
+PALETTE = None
 
-if not videos:
-    print("❌ No videos found in videos/ folder!")
-    print("Please add your videos to: d:\\4-traffic backend\\videos\\")
-    input("\nPress Enter to exit...")
-    sys.exit(1)
+# Label text -> (w, h), labels repeat across frames (class name + 2-decimal confidence)
+_TEXT_SIZES = OrderedDict()
+_TEXT_SIZES_MAX = 1024
 
-print(f"📹 Found {len(videos)} video(s):\n")
-for i, v in enumerate(videos, 1):
-    print(f"  {i}. {v.name}")
 
-print(f"\n{'='*70}")
-print("Processing videos... This will take a few minutes.")
-print(f"{'='*70}\n")
+def text_size(label_text):
+    """cv2.getTextSize for label text, memoized in a bounded LRU"""
+    size = _TEXT_SIZES.get(label_text)
+    if size is None:
+        size = _TEXT_SIZES[label_text] = cv2.getTextSize(label_text, _FONT, 0.5, 1)[0]
+        if len(_TEXT_SIZES) > _TEXT_SIZES_MAX:
+            _TEXT_SIZES.popitem(last=False)
+    else:
+        _TEXT_SIZES.move_to_end(label_text)
+    return size
 
-# Process each video
-for idx, video_path in enumerate(videos[:4]):  # Max 4 videos
-    lane_name = Config.LANE_NAMES[idx] if idx < 4 else f"Video {idx}"
-    output_name = f"{lane_name}_WITH_BOXES.mp4"
-    output_path = Config.OUTPUT_DIR / output_name
-    
-    print(f"\n🎬 Processing: {video_path.name} ({lane_name})")
-    print(f"💾 Output: {output_name}")
-    print("-" * 70)
-    
-    # Open video
-    cap = cv2.VideoCapture(str(video_path))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
-    print(f"📊 Resolution: {width}x{height}, FPS: {fps}, Frames: {total_frames}")
+
+def draw_frame(frame, bboxes, class_ids, confs, lane_name):
+    """Draw vehicle boxes and the lane info overlay onto a frame in place"""
+    if len(bboxes):
+        # Label text + background rects, one entry per box
+        labels = [f"{CLASS_NAMES[class_id]} {conf:.2f}" for class_id, conf in zip(class_ids.tolist(), confs.tolist())]
+        label_rects = np.empty((len(labels), 4), dtype=np.int32)
+        for i, label_text in enumerate(labels):
+            w, h = text_size(label_text)
+            x1, y1 = int(bboxes[i, 0]), int(bboxes[i, 1])
+            label_rects[i] = (x1, y1 - h - 10, x1 + w, y1)
+        
+        # ⚡ Box outlines + label backgrounds in one compiled pass each
+        draw_boxes(frame, bboxes, class_ids, PALETTE)
+        fill_rects(frame, label_rects, class_ids, PALETTE)
+        
+        # Text stays on cv2 (glyph rendering)
+        for label_text, (x1, y1) in zip(labels, bboxes[:, :2].tolist()):
+            cv2.putText(frame, label_text, (x1, y1-5), _FONT, 0.5, (255,255,255), 1)
     
-    # Create output video
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
+    # Add info overlay
+    cv2.rectangle(frame, (10, 10), (350, 80), (0, 0, 0), -1)
+    cv2.putText(frame, f"Lane: {lane_name}", (20, 35), _FONT, 0.7, (0, 255, 0), 2)
+    cv2.putText(frame, f"Vehicles: {len(bboxes)}", (20, 65), _FONT, 0.6, (255, 255, 0), 2)
+
+
+def _put(q, item, errors):
+    """Blocking put that gives up once any pipeline stage has failed"""
+    while not errors:
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(q, errors):
+    """Blocking get that returns the None sentinel once any pipeline stage has failed"""
+    while not errors:
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return None
+
+
+def read_frames(cap, frames_q, errors):
+    """Reader stage: decode frames and push (idx, frame) until end of video"""
+    try:
+        idx = 0
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if not _put(frames_q, (idx, frame), errors):
+                break
+            idx += 1
+    except Exception as e:
+        errors.append(e)
+    finally:
+        _put(frames_q, None, errors)
+
+
+def _phash(frame):
+    """64-bit average hash (8x8 grayscale, mean-thresholded) for near-duplicate detection"""
+    small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (8, 8), interpolation=cv2.INTER_AREA)
+    return int.from_bytes(np.packbits(small > small.mean()).tobytes(), 'big')
+
+
+def infer_frames(frames_q, results_q, errors):
+    """Inference stage: batch frames and push (idx, frame, detections)
     
-    frame_count = 0
-    vehicle_count = 0
+    When Config.DEDUP_MAX_HAMMING >= 0 (opt-in), near-duplicate frames (average hash
+    within that many bits of the previous frame) reuse the previous frame's detections
+    instead of running YOLO.
+    """
+    try:
+        _infer_loop(frames_q, results_q, errors)
+    except Exception as e:
+        errors.append(e)
+    finally:
+        _put(results_q, None, errors)
+
+
+def _infer_loop(frames_q, results_q, errors):
+    """Body of infer_frames; returns at end of video or when another stage fails"""
+    if cuda_stream is not None:
+        import torch
+        torch.cuda.set_stream(cuda_stream)  # Current stream is per-thread
     
+    pending = []     # (idx, frame, position in to_infer, or -1 = last_dets)
+    to_infer = []    # Frames that actually go through the model
+    last_hash = None
+    last_dets = None
+    reuse_run = 0
+    dedupe = Config.DEDUP_MAX_HAMMING >= 0
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Detect vehicles
-        detections = detector.detect_vehicles(frame)
-        
-        # Draw boxes around vehicles
-        for det in detections:
-            x1, y1, x2, y2 = det['bbox']
-            label = det['class_name']
-            conf = det['confidence']
-            
-            # Color based on vehicle type
-            colors = {
-                'car': (0, 255, 0),      # Green
-                'bus': (0, 0, 255),      # Red
-                'truck': (255, 0, 255),  # Magenta
-                'motorcycle': (255, 0, 0),  # Blue
-                'bicycle': (0, 255, 255)    # Yellow
-            }
-            color = colors.get(label, (255, 255, 255))
+        item = _get(frames_q, errors)
+        if errors:
+            return
+        if item is not None:
+            idx, frame = item
             
-            # Draw rectangle
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            
-            # Draw label
-            label_text = f"{label} {conf:.2f}"
-            (w, h), _ = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-            cv2.rectangle(frame, (x1, y1-h-10), (x1+w, y1), color, -1)
-            cv2.putText(frame, label_text, (x1, y1-5), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
-        
-        # Add info overlay
-        cv2.rectangle(frame, (10, 10), (350, 80), (0, 0, 0), -1)
-        cv2.putText(frame, f"Lane: {lane_name}", (20, 35), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(frame, f"Vehicles: {len(detections)}", (20, 65), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+            # ⚡ DEDUPE: stationary traffic produces long runs of near-identical frames
+            frame_hash = _phash(frame) if dedupe else None
+            is_dup = (
+                last_hash is not None
+                and reuse_run < Config.DEDUP_MAX_REUSE
+                and bin(frame_hash ^ last_hash).count('1') <= Config.DEDUP_MAX_HAMMING
+            )
+            if is_dup:
+                src = pending[-1][2] if pending else -1  # Same source as the previous frame
+                reuse_run += 1
+            else:
+                src = len(to_infer)
+                to_infer.append(frame)
+                reuse_run = 0
+                last_hash = frame_hash
+            pending.append((idx, frame, src))
         
-        out.write(frame)
+        # Run the batch when full, and flush the remainder at end of video
+        if pending and (item is None or len(to_infer) == Config.BATCH_SIZE
+                        or len(pending) >= 2 * Config.BATCH_SIZE):
+            dets_per_frame = detector.detect_vehicles_arrays(to_infer) if to_infer else []
+            for idx, frame, src in pending:
+                dets = dets_per_frame[src] if src >= 0 else last_dets
+                if not _put(results_q, (idx, frame, dets), errors):
+                    return
+            last_dets = dets
+            pending = []
+            to_infer = []
         
-        frame_count += 1
-        vehicle_count += len(detections)
+        if item is None:
+            return
+
+
+def write_frames(results_q, out, lane_name, total_frames, stats, errors):
+    """Writer stage: reorder by frame index, draw and encode"""
+    try:
+        pending = []
+        next_idx = 0
+        last_report = time.monotonic()
+        while True:
+            item = _get(results_q, errors)
+            if item is None:
+                break
+            heapq.heappush(pending, (item[0], item[1:]))
+            
+            while pending and pending[0][0] == next_idx:
+                _, (frame, (bboxes, class_ids, confs)) = heapq.heappop(pending)
+                draw_frame(frame, bboxes, class_ids, confs, lane_name)
+                out.write(frame)
+                next_idx += 1
+                
+                stats['frames'] += 1
+                stats['vehicles'] += len(bboxes)
+                
+                # Progress (throttled, reported to the parent process which renders it)
+                now = time.monotonic()
+                if now - last_report > 0.5:
+                    progress_q.put((lane_name, stats['frames'], total_frames, len(bboxes)))
+                    last_report = now
+    except Exception as e:
+        errors.append(e)
+    finally:
+        progress_q.put((lane_name, stats['frames'], total_frames, 0))
+
+
+def init_worker(queue_, model_path):
+    """Process pool initializer: load one detector per worker process (model exported by the parent)"""
+    global detector, cuda_stream, progress_q, CLASS_NAMES, CLASS_COLORS, PALETTE
+    progress_q = queue_
+    
+    # OpenCV's own thread pool would fight the pipeline threads for cores
+    cv2.setNumThreads(1)
+    
+    detector = VehicleDetector(model_path=model_path, export=False)
+    
+    # Each worker submits its kernels on its own CUDA stream so two videos overlap on one GPU
+    cuda_stream = None
+    if detector.use_cuda:
+        import torch
+        cuda_stream = torch.cuda.Stream(device=detector.device)
+    
+    # Class id -> name/color, resolved once instead of per box
+    CLASS_NAMES = detector.vehicle_classes
+    CLASS_COLORS = {cid: _COLORS.get(name, (255, 255, 255)) for cid, name in CLASS_NAMES.items()}
+    PALETTE = build_palette(CLASS_COLORS)
+
+
+def process_one(video_path, lane_name):
+    """Annotate one video in a worker process
+    
+    Args:
+        video_path: Input video file
+        lane_name: Lane label drawn on every frame
         
-        # Progress
-        if frame_count % 30 == 0:
-            progress = (frame_count / total_frames) * 100
-            print(f"⏳ {progress:.0f}% | Frame {frame_count}/{total_frames} | "
-                  f"Vehicles: {len(detections)}", end='\r')
+    Returns:
+        tuple: (output_path, total vehicles detected)
+    """
+    output_path = Config.OUTPUT_DIR / f"{lane_name}_WITH_BOXES.mp4"
+    
+    # Open video
+    cap = open_capture(video_path)
+    fps, width, height, total_frames = get_video_info(cap)
+    
+    print(f"📊 {lane_name}: {width}x{height}, FPS: {fps}, Frames: {total_frames}")
+    
+    # Create output video (NVENC when available, mp4v otherwise)
+    out = create_video_writer(output_path, fps, (width, height))
+    
+    # 🚀 PIPELINED: reader -> batched inference -> writer, connected by bounded queues
+    frames_q = queue.Queue(maxsize=32)
+    results_q = queue.Queue(maxsize=32)
+    stats = {'frames': 0, 'vehicles': 0}
+    errors = []  # First exception from any stage; the others see it and stop instead of blocking
+    
+    stages = [
+        threading.Thread(target=read_frames, args=(cap, frames_q, errors), daemon=True),
+        threading.Thread(target=infer_frames, args=(frames_q, results_q, errors), daemon=True),
+        threading.Thread(target=write_frames, args=(results_q, out, lane_name, total_frames, stats, errors), daemon=True)
+    ]
+    for stage in stages:
+        stage.start()
+    
+    # Writer drains last, so joining all stages guarantees every frame is written
+    for stage in stages:
+        stage.join()
     
     cap.release()
     out.release()
     
-    print(f"\n✅ Done! Detected {vehicle_count} vehicles total")
-    print(f"📁 Saved: {output_path}")
-
-# Final summary
-print(f"\n{'='*70}")
-print("🎉 ALL VIDEOS PROCESSED!")
-print(f"{'='*70}\n")
-
-print("📂 Your annotated videos are in:")
-print(f"   {Config.OUTPUT_DIR}\n")
-
-print("🎬 Files created:")
-for video in Config.OUTPUT_DIR.glob("*_WITH_BOXES.mp4"):
-    print(f"   ✓ {video.name}")
+    if errors:
+        raise errors[0]
+    
+    return output_path, stats['vehicles']
 
-print(f"\n{'='*70}")
-print("💡 Open the 'output' folder and play the videos!")
-print("   You'll see colored boxes around detected vehicles")
-print(f"{'='*70}\n")
 
-input("Press Enter to exit...")
+if __name__ == '__main__':
+    print("\n" + "="*70)
+    print("🚗 QUICK VIDEO PROCESSOR - Creating Annotated Videos")
+    print("="*70 + "\n")
+    
+    # Find videos
+    videos = list(Config.VIDEO_DIR.glob("*.mp4"))
+    
+    if not videos:
+        print("❌ No videos found in videos/ folder!")
+        print("Please add your videos to: d:\\4-traffic backend\\videos\\")
+        input("\nPress Enter to exit...")
+        sys.exit(1)
+    
+    print(f"📹 Found {len(videos)} video(s):\n")
+    for i, v in enumerate(videos, 1):
+        print(f"  {i}. {v.name}")
+    
+    print(f"\n{'='*70}")
+    print(f"Processing videos ({Config.VIDEO_WORKERS} at a time)... This will take a few minutes.")
+    print(f"{'='*70}\n")
+    
+    # 🚀 PARALLEL: each worker process loads its own detector and runs one video pipeline
+    # Export TensorRT/OpenVINO once here; workers exporting concurrently would clobber each other's files
+    model_path = VehicleDetector.prepare_model()
+    
+    print("🔧 Loading AI model (YOLOv8) in worker processes...")
+    # spawn: the export above may have initialized CUDA, which forked children cannot reuse.
+    # The queue must come from the same context as the pool or its SemLock cannot be shared.
+    ctx = multiprocessing.get_context('spawn')
+    progress_queue = ctx.Queue()
+    with ProcessPoolExecutor(max_workers=Config.VIDEO_WORKERS, initializer=init_worker,
+                             initargs=(progress_queue, model_path),
+                             mp_context=ctx) as pool:
+        futures = {}
+        for idx, video_path in enumerate(videos[:4]):  # Max 4 videos
+            lane_name = Config.LANE_NAMES[idx] if idx < 4 else f"Video {idx}"
+            print(f"🎬 Queued: {video_path.name} ({lane_name}) -> {lane_name}_WITH_BOXES.mp4")
+            futures[pool.submit(process_one, video_path, lane_name)] = lane_name
+        
+        # One progress bar per lane, fed by worker updates until every video is done
+        bars = {}
+        pending = set(futures)
+        while pending:
+            try:
+                lane_name, frames, total_frames, vehicles = progress_queue.get(timeout=0.5)
+                bar = bars.get(lane_name)
+                if bar is None:
+                    bar = bars[lane_name] = tqdm(total=total_frames, unit='f', desc=lane_name, position=len(bars))
+                bar.update(frames - bar.n)
+                bar.set_postfix_str(f"vehicles={vehicles}")
+            except queue.Empty:
+                pass
+            
+            for future in [f for f in pending if f.done()]:
+                pending.discard(future)
+                output_path, vehicle_count = future.result()
+                tqdm.write(f"✅ {futures[future]} done! Detected {vehicle_count} vehicles total")
+                tqdm.write(f"📁 Saved: {output_path}")
+        
+        for bar in bars.values():
+            bar.close()
+    
+    # Final summary
+    print(f"\n{'='*70}")
+    print("🎉 ALL VIDEOS PROCESSED!")
+    print(f"{'='*70}\n")
+    
+    print("📂 Your annotated videos are in:")
+    print(f"   {Config.OUTPUT_DIR}\n")
+    
+    print("🎬 Files created:")
+    for video in Config.OUTPUT_DIR.glob("*_WITH_BOXES.mp4"):
+        print(f"   ✓ {video.name}")
+    
+    print(f"\n{'='*70}")
+    print("💡 Open the 'output' folder and play the videos!")
+    print("   You'll see colored boxes around detected vehicles")
+    print(f"{'='*70}\n")
+    
+    input("Press Enter to exit...")
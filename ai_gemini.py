@@ -9,26 +9,95 @@ from loguru import logger
 import json
 from datetime import datetime
 import time
+import threading
 import hashlib
+import functools
+from collections import OrderedDict
+
+# ⚡ Optional fast serializer / hasher (fall back to stdlib if missing)
+try:
+    import orjson
+    _ORJSON_OPTS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+except ImportError:
+    orjson = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
 
 # Load environment variables
 load_dotenv()
 
+
+def _fast_canonical_bytes(data):
+    """Serialize data to canonical (key-sorted) JSON bytes"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=_ORJSON_OPTS)
+        except TypeError:
+            pass  # Unsupported type, use the stdlib encoder below
+    return json.dumps(data, sort_keys=True, default=str).encode()
+
+
+@functools.lru_cache(maxsize=1)
+def _list_gemini_models():
+    """List models supporting generateContent (one network call per process)"""
+    logger.info("🔍 Fetching available Gemini models...")
+    available_models = []
+    for model in genai.list_models():
+        if 'generateContent' in model.supported_generation_methods:
+            model_name = model.name.replace('models/', '')  # Remove prefix
+            available_models.append(model_name)
+            logger.info(f"   ✓ {model_name}")
+    return tuple(available_models)
+
+
+def _json_pretty(data):
+    """Serialize data to 2-space indented JSON text for prompts"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+        except TypeError:
+            pass
+    return json.dumps(data, indent=2, default=str)
+
+
+def _json_loads(text):
+    """Parse JSON text (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _cache_key(data):
+    """Compute an integer cache key for JSON-serializable data"""
+    buf = _fast_canonical_bytes(data)
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(buf)
+    return int.from_bytes(hashlib.blake2b(buf, digest_size=8).digest(), 'little')
+
+
 class GeminiAI:
     """Gemini AI Integration for Traffic Analysis"""
     
     def __init__(self):
         """Initializes the Gemini AI model and logger."""
-        self.configure_genai()
-        self.model = self.get_available_model()
+        self.model = self.configure_genai()
         self.logger = logger
-        self.last_api_call_time = 0
+        self.last_api_call_time = float('-inf')  # time.monotonic() of last call
         self.api_cooldown = 15  # seconds
-        self.cache = {}
+        self.cache = OrderedDict()  # LRU: oldest entry first
+        self.cache_max_size = 256
         self.cache_expiry = 60 # seconds
+        self._lock = threading.Lock()  # Guards cache + cooldown across gunicorn request threads
 
     def configure_genai(self):
-        """Configures the Gemini AI with API key and model selection"""
+        """Configures the Gemini AI with API key and model selection
+
+        Returns:
+            str: Selected model name
+        """
         api_key = os.getenv('GEMINI_API_KEY')
         if not api_key:
             raise ValueError("GEMINI_API_KEY not found in .env file")
@@ -40,13 +109,7 @@ class GeminiAI:
         
         # Try to get available models
         try:
-            logger.info("🔍 Fetching available Gemini models...")
-            available_models = []
-            for model in genai.list_models():
-                if 'generateContent' in model.supported_generation_methods:
-                    model_name = model.name.replace('models/', '')  # Remove prefix
-                    available_models.append(model_name)
-                    logger.info(f"   ✓ {model_name}")
+            available_models = _list_gemini_models()
             
             if available_models:
                 # Use first available model
@@ -63,58 +126,44 @@ class GeminiAI:
             self.model_name = self.model_name or 'gemini-pro'
             logger.info(f"Using fallback model: {self.model_name}")
 
-        # Do not pre-instantiate a model object
-        self.model = None
-        logger.success(f"🤖 Gemini AI initialized with model: {self.model_name}")
-
-    def get_available_model(self):
-        """Gets the available model, handling any errors"""
+        # Build the model object once and share it across requests
         try:
-            logger.info("🔍 Fetching available Gemini models...")
-            available_models = []
-            for model in genai.list_models():
-                if 'generateContent' in model.supported_generation_methods:
-                    model_name = model.name.replace('models/', '')  # Remove prefix
-                    available_models.append(model_name)
-                    logger.info(f"   ✓ {model_name}")
-            
-            if available_models:
-                # Use first available model
-                model_name = available_models[0]
-                logger.success(f"✅ Selected model: {model_name}")
-                return model_name
-            else:
-                # Fallback to known stable model
-                fallback_model = 'gemini-pro'
-                logger.warning(f"⚠️ No models found, using fallback: {fallback_model}")
-                return fallback_model
-                
+            self._gen_model = genai.GenerativeModel(self.model_name)
         except Exception as e:
-            logger.error(f"Error getting available models: {e}")
-            return None
+            logger.error(f"Could not create Gemini model '{self.model_name}': {e}")
+            self._gen_model = None
+        logger.success(f"🤖 Gemini AI initialized with model: {self.model_name}")
+        return self.model_name
 
     def analyze_traffic_decision(self, vehicle_data, frame_width, frame_height):
         """
         Analyzes traffic data to make intelligent decisions, with caching and rate limiting.
         """
         # Create a hash of the vehicle data for caching
-        vehicle_data_str = json.dumps(vehicle_data, sort_keys=True)
-        data_hash = hashlib.md5(vehicle_data_str.encode()).hexdigest()
-
-        # Check cache first
-        if data_hash in self.cache:
-            cached_data = self.cache[data_hash]
-            if time.time() - cached_data['timestamp'] < self.cache_expiry:
-                self.logger.info("Returning cached AI decision.")
-                return cached_data['response']
-
-        # Rate limiting
-        current_time = time.time()
-        if current_time - self.last_api_call_time < self.api_cooldown:
+        data_hash = _cache_key(vehicle_data)
+
+        with self._lock:
+            # Check cache first
+            current_time = time.monotonic()
+            cached_data = self.cache.get(data_hash)
+            if cached_data is not None:
+                if current_time - cached_data['timestamp'] < self.cache_expiry:
+                    self.cache.move_to_end(data_hash)
+                    self.logger.info("Returning cached AI decision.")
+                    return cached_data['response']
+                del self.cache[data_hash]  # Expired
+
+            # Rate limiting
+            cooldown_active = current_time - self.last_api_call_time < self.api_cooldown
+            if not cooldown_active and self._gen_model is not None:
+                # Claim the call slot now so concurrent requests see the cooldown
+                self.last_api_call_time = current_time
+
+        if cooldown_active:
             self.logger.warning("API cooldown active. Skipping Gemini AI call.")
             return self._create_fallback_response(traffic_data=vehicle_data, error_message="Cooldown active, using fallback.", status="WAIT")
 
-        if not self.model:
+        if self._gen_model is None:
             self.logger.error("No model available for analysis.")
             return self._create_fallback_response(traffic_data=vehicle_data, error_message="AI model not available.", status="ERROR")
 
@@ -122,19 +171,20 @@ class GeminiAI:
         
         try:
             self.logger.info("Requesting decision from Gemini AI...")
-            model = genai.GenerativeModel(self.model)
-            response = model.generate_content(prompt)
+            response = self._gen_model.generate_content(prompt)
             
-            self.last_api_call_time = time.time() # Update timestamp after successful call
-
             cleaned_response_text = response.text.strip().replace("```json", "").replace("```", "")
-            decision = json.loads(cleaned_response_text)
+            decision = _json_loads(cleaned_response_text)
             
-            # Cache the new response
-            self.cache[data_hash] = {
-                'timestamp': time.time(),
-                'response': decision
-            }
+            # Cache the new response (evict least recently used when full)
+            with self._lock:
+                if data_hash not in self.cache and len(self.cache) >= self.cache_max_size:
+                    self.cache.popitem(last=False)
+                self.cache[data_hash] = {
+                    'timestamp': time.monotonic(),
+                    'response': decision
+                }
+                self.cache.move_to_end(data_hash)
             
             self.logger.success("Successfully received and parsed AI decision.")
             return decision
@@ -152,7 +202,7 @@ class GeminiAI:
             prompt = f"""You are an expert traffic management AI. Analyze the following traffic data and provide a detailed decision.
 
 **Traffic Data:**
-{json.dumps(vehicle_data, indent=2)}
+{_json_pretty(vehicle_data)}
 
 **Frame Dimensions:**
 Width: {frame_width}, Height: {frame_height}
@@ -264,7 +314,7 @@ Width: {frame_width}, Height: {frame_height}
             prompt = f"""Analyze this traffic pattern data and provide insights:
 
 **Historical Data (last 30 minutes):**
-{json.dumps(historical_data, indent=2)}
+{_json_pretty(historical_data)}
 
 **Provide:**
 1. Trend analysis (increasing/decreasing/stable)
@@ -280,7 +330,9 @@ Width: {frame_width}, Height: {frame_height}
   "optimization_tips": ["tip1", "tip2", "tip3"]
 }}"""
 
-            response = self.model.generate_content(prompt)
+            if self._gen_model is None:
+                raise RuntimeError("AI model not available")
+            response = self._gen_model.generate_content(prompt)
             response_text = response.text.strip()
             
             # Clean response
@@ -289,7 +341,7 @@ Width: {frame_width}, Height: {frame_height}
                 if response_text.startswith("json"):
                     response_text = response_text[4:]
             
-            insights = json.loads(response_text.strip())
+            insights = _json_loads(response_text.strip())
             return insights
             
         except Exception as e:
@@ -2,9 +2,16 @@
 Example client script to interact with the Traffic Management API
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
+from contextlib import ExitStack
 from pathlib import Path
 
+try:
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
+
 
 class TrafficAPIClient:
     """Client to interact with Traffic Management API"""
@@ -12,9 +19,20 @@ class TrafficAPIClient:
     def __init__(self, base_url="http://localhost:5000"):
         self.base_url = base_url
         
+        # Reuse one keep-alive connection pool across all API calls
+        self.session = requests.Session()
+        self.session.headers.update({'Connection': 'keep-alive'})
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+        
     def health_check(self):
         """Check if API is running"""
-        response = requests.get(f"{self.base_url}/api/health")
+        response = self.session.get(f"{self.base_url}/api/health")
         return response.json()
     
     def process_videos_with_paths(self, video_paths):
@@ -25,7 +43,7 @@ class TrafficAPIClient:
             video_paths: List of 4 video file paths
         """
         data = {"videos": video_paths}
-        response = requests.post(
+        response = self.session.post(
             f"{self.base_url}/api/process-videos",
             json=data
         )
@@ -38,45 +56,56 @@ class TrafficAPIClient:
         Args:
             video_files: List of 4 video file paths to upload
         """
-        files = {}
-        for i, video_path in enumerate(video_files[:4]):
-            with open(video_path, 'rb') as f:
+        # Keep every file open until the upload finishes
+        with ExitStack() as stack:
+            files = {}
+            for i, video_path in enumerate(video_files[:4]):
+                f = stack.enter_context(open(video_path, 'rb'))
                 files[f'video_{i}'] = (Path(video_path).name, f, 'video/mp4')
-        
-        response = requests.post(
-            f"{self.base_url}/api/process-videos",
-            files=files
-        )
+            
+            if MultipartEncoder is not None:
+                # Stream the body from disk with a known Content-Length
+                encoder = MultipartEncoder(fields=files)
+                response = self.session.post(
+                    f"{self.base_url}/api/process-videos",
+                    data=encoder,
+                    headers={'Content-Type': encoder.content_type}
+                )
+            else:
+                response = self.session.post(
+                    f"{self.base_url}/api/process-videos",
+                    files=files
+                )
         return response.json()
     
     def get_status(self):
         """Get current processing status"""
-        response = requests.get(f"{self.base_url}/api/status")
+        response = self.session.get(f"{self.base_url}/api/status")
         return response.json()
     
     def get_signals(self):
         """Get current traffic signal states"""
-        response = requests.get(f"{self.base_url}/api/signals")
+        response = self.session.get(f"{self.base_url}/api/signals")
         return response.json()
     
     def get_analysis(self):
         """Get latest traffic analysis"""
-        response = requests.get(f"{self.base_url}/api/analysis")
+        response = self.session.get(f"{self.base_url}/api/analysis")
         return response.json()
     
     def get_history(self, limit=10):
         """Get signal change history"""
-        response = requests.get(f"{self.base_url}/api/history?limit={limit}")
+        response = self.session.get(f"{self.base_url}/api/history?limit={limit}")
         return response.json()
     
     def reset_system(self):
         """Reset the system"""
-        response = requests.post(f"{self.base_url}/api/reset")
+        response = self.session.post(f"{self.base_url}/api/reset")
         return response.json()
     
     def get_lane_info(self, lane_id):
         """Get information for specific lane"""
-        response = requests.get(f"{self.base_url}/api/lane/{lane_id}")
+        response = self.session.get(f"{self.base_url}/api/lane/{lane_id}")
         return response.json()
 
 
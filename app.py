@@ -4,11 +4,18 @@ Advanced Traffic Management System Backend
 """
 import os
 import sys
+import gzip
+import hashlib
+import time
+import atexit
 import threading
+from bisect import bisect_left
+from collections import OrderedDict
 from flask import Flask, request, jsonify, send_file, Response
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from loguru import logger
 
 # Import cv2 for video streaming (lightweight, fast import)
@@ -18,6 +25,56 @@ except ImportError:
     cv2 = None
     logger.warning("⚠️ OpenCV not available - video streaming disabled")
 
+# ⚡ libjpeg-turbo JPEG encoder for MJPEG streaming (falls back to cv2.imencode)
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
+
+# ⚡ Fast JSON serialization for API responses (falls back to stdlib json)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (numpy arrays/scalars serialize natively)"""
+
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Skip the bytes -> str -> bytes round trip of the base implementation
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.option)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+# cv2.imencode fallback flags: baseline (no optimize/progressive passes), 4:2:0 chroma where supported
+_CV2_JPEG_FLAGS = []
+if cv2 is not None:
+    _CV2_JPEG_FLAGS = [cv2.IMWRITE_JPEG_OPTIMIZE, 0, cv2.IMWRITE_JPEG_PROGRESSIVE, 0]
+    if hasattr(cv2, 'IMWRITE_JPEG_SAMPLING_FACTOR'):  # OpenCV >= 4.5.5
+        _CV2_JPEG_FLAGS += [cv2.IMWRITE_JPEG_SAMPLING_FACTOR, cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420]
+
+
+def encode_jpeg(frame, quality=60):
+    """Encode a BGR frame to JPEG bytes (4:2:0, fast DCT), or None on failure"""
+    if simplejpeg is not None:
+        if not frame.flags['C_CONTIGUOUS']:
+            frame = frame.copy()
+        return simplejpeg.encode_jpeg(frame, quality=quality, colorspace='BGR',
+                                      colorsubsampling='420', fastdct=True)
+    
+    ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality] + _CV2_JPEG_FLAGS)
+    return buffer.tobytes() if ret else None
+
 # Configure logging first
 logger.remove()
 logger.add(
@@ -28,6 +85,11 @@ logger.add(
 
 # Import config only
 from config import Config
+from rolling_window import RollingWindow
+
+if cv2 is not None:
+    from video_io import open_live_capture
+    from lane_stream import LaneGrabber
 
 logger.add(
     Config.LOGS_DIR / "traffic_system_{time}.log",
@@ -40,9 +102,12 @@ logger.add(
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# ⚡ orjson for every jsonify()/request.get_json() call (3-5x faster than stdlib json)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+
 # 🎯 MEMORY OPTIMIZATION: Set max content length to prevent memory errors
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max
-app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # Disable caching
 
 # 🌐 CORS Configuration - Allow frontend domains
 CORS(app, resources={
@@ -71,6 +136,18 @@ signal_controller = None
 gemini_ai = None
 components_loaded = False
 components_loading = True
+_detector_lock = threading.Lock()
+
+
+def get_detector():
+    """Shared VehicleDetector, built once on first use (thread-safe, never torn down)"""
+    global detector
+    if detector is None:
+        with _detector_lock:
+            if detector is None:
+                from vehicle_detector import VehicleDetector
+                detector = VehicleDetector()
+    return detector
 
 # Background initialization function
 def initialize_components():
@@ -80,18 +157,14 @@ def initialize_components():
     logger.info("🔄 Background initialization starting...")
     
     try:
-        # Import heavy modules only in background
-        logger.info("Importing cv2...")
-        import cv2
-        
-        logger.info("Importing vehicle detector...")
-        from vehicle_detector import VehicleDetector
+        # Import heavy modules only in background (get_detector() imports the detector itself)
+        logger.info("Importing traffic modules...")
         from traffic_analyzer import TrafficAnalyzer
         from signal_controller import TrafficSignalController
         from ai_gemini import GeminiAI
         
         logger.info("Initializing YOLOv8 Vehicle Detector...")
-        detector = VehicleDetector()
+        get_detector()
         logger.info("✅ Detector initialized successfully!")
     except Exception as e:
         logger.error(f"❌ Detector initialization failed: {e}. Detection features disabled.")
@@ -121,38 +194,110 @@ init_thread = threading.Thread(target=initialize_components, daemon=True)
 init_thread.start()
 logger.info("🚀 Background initialization thread started")
 
+class ProcessingStatus:
+    """Processing state shared by the detection threads and request handlers
+    
+    Every access goes through one RLock; writers publish related fields together with
+    update() and readers take a consistent shallow copy with snapshot().
+    """
+    
+    _DEFAULTS = {
+        'is_processing': False,
+        'current_phase': '',
+        'progress': 0,
+        'lane_results': [],
+        'analysis_result': None
+    }
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._state = dict(self._DEFAULTS)
+    
+    def __getitem__(self, key):
+        with self._lock:
+            return self._state[key]
+    
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._state[key] = value
+    
+    def get(self, key, default=None):
+        with self._lock:
+            return self._state.get(key, default)
+    
+    def update(self, **fields):
+        """Set several fields atomically"""
+        with self._lock:
+            self._state.update(fields)
+    
+    def snapshot(self) -> dict:
+        """Consistent shallow copy of the whole state"""
+        with self._lock:
+            return dict(self._state)
+    
+    def reset(self):
+        """Restore the initial idle state"""
+        with self._lock:
+            self._state = dict(self._DEFAULTS)
+
+
 # Global state
-processing_status = {
-    'is_processing': False,
-    'current_phase': '',
-    'progress': 0,
-    'lane_results': [],
-    'analysis_result': None
-}
+processing_status = ProcessingStatus()
+
+
+# ⚡ Frontend assets: read + gzip once at startup, served from memory
+STATIC_ASSETS = {}
+for _name, _mimetype in (('index.html', 'text/html'), ('styles.css', 'text/css'), ('script.js', 'application/javascript')):
+    try:
+        _raw = (Path(__file__).parent / _name).read_bytes()
+        STATIC_ASSETS[_name] = (_raw, gzip.compress(_raw, 9), _mimetype, hashlib.sha1(_raw).hexdigest()[:16])
+    except OSError as e:
+        logger.warning(f"⚠️ Static asset not loaded: {_name} ({e})")
+
+
+def serve_static_asset(name):
+    """Serve a cached frontend asset, gzip-encoded when the client accepts it.
+
+    Clients revalidate on every load (no-cache + ETag), so a deploy is picked up
+    immediately while unchanged assets cost only a 304.
+    """
+    asset = STATIC_ASSETS.get(name)
+    if asset is None:
+        return jsonify({'error': f'{name} not found'}), 404
+    
+    raw, compressed, mimetype, digest = asset
+    use_gzip = 'gzip' in request.accept_encodings
+    etag = f'{digest}-gz' if use_gzip else digest  # Distinct tag per encoding
+    headers = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding', 'ETag': f'"{etag}"'}
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+    if use_gzip:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(compressed, mimetype=mimetype, headers=headers)
+    return Response(raw, mimetype=mimetype, headers=headers)
 
 
 @app.route('/', methods=['GET'])
 def home():
     """Serve the frontend dashboard"""
-    return send_file('index.html')
+    return serve_static_asset('index.html')
 
 
 @app.route('/styles.css', methods=['GET'])
 def serve_css():
     """Serve CSS file"""
-    return send_file('styles.css')
+    return serve_static_asset('styles.css')
 
 
 @app.route('/script.js', methods=['GET'])
 def serve_js():
     """Serve JavaScript file"""
-    return send_file('script.js')
+    return serve_static_asset('script.js')
 
 
 @app.route('/videos/<filename>', methods=['GET'])
 def serve_video(filename):
     """Serve video files"""
-    import os
     video_path = os.path.join('videos', filename)
     if os.path.exists(video_path):
         return send_file(video_path, mimetype='video/mp4')
@@ -160,93 +305,89 @@ def serve_video(filename):
         return jsonify({'error': 'Video not found'}), 404
 
 
+# Live-detection decoders still running; released at interpreter exit so FFmpeg contexts don't leak
+_live_grabbers = set()
+
+
+@atexit.register
+def _release_live_grabbers():
+    """Stop any live-detection decoders left running at shutdown"""
+    for grabber in list(_live_grabbers):
+        grabber.stop()
+
+
+# Lane id -> LaneStream, shared by every client watching that lane
+lane_streams = {}
+lane_streams_lock = threading.Lock()
+
+
+def get_lane_stream(lane_id):
+    """Get (creating and starting on first use) the background stream for a lane"""
+    from lane_stream import LaneStream
+    
+    with lane_streams_lock:
+        stream = lane_streams.get(lane_id)
+        if stream is None:
+            stream = lane_streams[lane_id] = LaneStream(
+                lane_id, Config.VIDEO_DIR / f"lane_{lane_id}.mp4", lambda: detector, encoder=encode_jpeg
+            )
+    stream.start()
+    return stream
+
+
 @app.route('/api/video-feed/<int:lane_id>', methods=['GET'])
 def video_feed(lane_id):
     """Stream video feed with detection overlays for a specific lane"""
     def generate_frames(lane_id):
-        """Generate frames with detection boxes"""
+        """Yield the latest pre-encoded frame from the lane's background stream"""
         video_path = Config.VIDEO_DIR / f"lane_{lane_id}.mp4"
         
         if not video_path.exists():
             return
         
-        cap = cv2.VideoCapture(str(video_path))
-        frame_count = 0
-        last_detections = []
-        lane_name = Config.LANE_NAMES[lane_id]  # Get lane name for tracker
+        lane_stream = get_lane_stream(lane_id)
+        last_seq = -1
         
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret:
-                    # Loop video
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    frame_count = 0
+                part, seq = lane_stream.latest_part()
+                if part is None or seq == last_seq:
+                    # Nothing new yet; make sure the producer is alive and wait a tick
+                    lane_stream.start()
+                    time.sleep(1 / 30)
                     continue
+                last_seq = seq
                 
-                frame_count += 1
-                
-                # Detect every 5th frame for better performance and memory
-                if frame_count % 5 == 0:
-                    try:
-                        # Pass lane_name to maintain separate tracker state
-                        last_detections = detector.detect_vehicles(frame, lane_id=lane_name)
-                    except Exception as e:
-                        logger.error(f"Detection error in video feed: {e}")
-                        last_detections = []
-                
-                # Draw bounding boxes from last detection
-                for det in last_detections:
-                    x1, y1, x2, y2 = map(int, det[:4])
-                    conf = det[4]
-                    
-                    # Draw box
-                    color = (0, 255, 0)  # Green
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    
-                    # Draw label
-                    label = f'Vehicle {conf:.2f}'
-                    cv2.putText(frame, label, (x1, y1 - 10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                
-                # Add lane info overlay
-                cv2.putText(frame, f'Lane {lane_id} - {len(last_detections)} vehicles', 
-                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # 🎯 MEMORY OPTIMIZATION: Resize frame before encoding to reduce memory usage
-                height, width = frame.shape[:2]
-                if width > 640:
-                    scale = 640 / width
-                    new_width = 640
-                    new_height = int(height * scale)
-                    frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-                
-                # Encode frame to JPEG with reduced quality for memory optimization
-                ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-                if not ret:
-                    continue
-                    
-                frame_bytes = buffer.tobytes()
-                
-                # 🎯 Clear buffer to free memory
-                del buffer
-                
-                # Yield frame in multipart format
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                # Shared multipart chunk (JPEG already encoded by the producer)
+                yield part
         
         except GeneratorExit:
-            # Client disconnected, cleanup resources
-            logger.info(f"Video feed {lane_id} client disconnected, cleaning up...")
-        finally:
-            # Always cleanup
-            cap.release()
-            logger.info(f"Video feed {lane_id} resources released")
+            # Client disconnected; the lane stream stops itself once it has no readers
+            logger.info(f"Video feed {lane_id} client disconnected")
     
     return Response(generate_frames(lane_id),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
+_video_files_cache = (0.0, ())  # (time.monotonic() of scan, paths)
+
+
+def list_video_files(ttl: float = 1.0):
+    """Video files (.mp4 first, then .avi) in the videos folder, from one scandir pass cached for `ttl` seconds"""
+    global _video_files_cache
+    scanned_at, paths = _video_files_cache
+    now = time.monotonic()
+    if now - scanned_at < ttl:
+        return paths
+    
+    with os.scandir(Config.VIDEO_DIR) as it:
+        entries = [e for e in it if e.name.endswith(('.mp4', '.avi')) and e.is_file()]
+    entries.sort(key=lambda e: e.name.endswith('.avi'))  # Keep .mp4 before .avi
+    paths = tuple(e.path for e in entries)
+    _video_files_cache = (now, paths)
+    return paths
+
+
 @app.route('/api/process-videos', methods=['POST'])
 def process_videos():
     """
@@ -257,18 +398,13 @@ def process_videos():
     OR
     - JSON with video paths: {"videos": ["path1", "path2", "path3", "path4"]}
     """
-    global detector, processing_status
-    
     try:
         processing_status['is_processing'] = True
         processing_status['current_phase'] = 'Initializing'
         processing_status['progress'] = 0
         
-        # Initialize detector if not already done
-        if detector is None:
-            logger.info("Initializing vehicle detector...")
-            from vehicle_detector import VehicleDetector
-            detector = VehicleDetector()
+        # Shared detector (built here only if background init has not finished)
+        detector = get_detector()
         
         # Get video sources
         video_paths = []
@@ -276,12 +412,13 @@ def process_videos():
         # Check if videos are uploaded as files
         if request.files:
             logger.info("Processing uploaded video files")
+            upload_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             for i in range(4):
                 file_key = f'video_{i}'
                 if file_key in request.files:
                     file = request.files[file_key]
                     # Save uploaded file
-                    filepath = Config.VIDEO_DIR / f"lane_{i}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4"
+                    filepath = Config.VIDEO_DIR / f"lane_{i}_{upload_stamp}.mp4"
                     file.save(str(filepath))
                     video_paths.append(str(filepath))
                     logger.info(f"Saved video {i} to {filepath}")
@@ -293,9 +430,9 @@ def process_videos():
         
         else:
             # Look for videos in the videos directory
-            video_files = list(Config.VIDEO_DIR.glob('*.mp4')) + list(Config.VIDEO_DIR.glob('*.avi'))
+            video_files = list_video_files()
             if len(video_files) >= 4:
-                video_paths = [str(f) for f in video_files[:4]]
+                video_paths = list(video_files[:4])
                 logger.info(f"Using videos from directory: {video_paths}")
             else:
                 return jsonify({
@@ -349,10 +486,12 @@ def process_videos():
         signal_status = signal_controller.update_signals(analysis_result)
         
         # Store results
-        processing_status['lane_results'] = lane_results
-        processing_status['analysis_result'] = analysis_result
-        processing_status['progress'] = 100
-        processing_status['current_phase'] = 'Completed'
+        processing_status.update(
+            lane_results=lane_results,
+            analysis_result=analysis_result,
+            progress=100,
+            current_phase='Completed'
+        )
         
         logger.success("Video processing completed successfully")
         
@@ -387,7 +526,7 @@ def get_status():
     """Get current processing status"""
     return jsonify({
         'success': True,
-        'status': processing_status
+        'status': processing_status.snapshot()
     })
 
 
@@ -405,85 +544,90 @@ def get_signals():
     })
 
 
+# Default/demo analysis served until the first real analysis is ready.
+# Built and serialized once at import instead of on every request.
+_DEFAULT_ANALYSIS_RESPONSE = {
+    'success': True,
+    'analysis': {
+        'priority_ranking': [
+            {
+                'rank': 1,
+                'lane_id': 1,
+                'lane_name': 'South',
+                'total_vehicles': 0,
+                'max_vehicles': 0,
+                'avg_vehicles': 0,
+                'congestion_score': 0,
+                'congestion_level': 'low',
+                'priority_score': 0,
+                'recommended_green_time': 15
+            },
+            {
+                'rank': 2,
+                'lane_id': 0,
+                'lane_name': 'North',
+                'total_vehicles': 0,
+                'max_vehicles': 0,
+                'avg_vehicles': 0,
+                'congestion_score': 0,
+                'congestion_level': 'low',
+                'priority_score': 0,
+                'recommended_green_time': 15
+            },
+            {
+                'rank': 3,
+                'lane_id': 2,
+                'lane_name': 'East',
+                'total_vehicles': 0,
+                'max_vehicles': 0,
+                'avg_vehicles': 0,
+                'congestion_score': 0,
+                'congestion_level': 'low',
+                'priority_score': 0,
+                'recommended_green_time': 15
+            },
+            {
+                'rank': 4,
+                'lane_id': 3,
+                'lane_name': 'West',
+                'total_vehicles': 0,
+                'max_vehicles': 0,
+                'avg_vehicles': 0,
+                'congestion_score': 0,
+                'congestion_level': 'low',
+                'priority_score': 0,
+                'recommended_green_time': 15
+            }
+        ],
+        'signal_assignment': {
+            0: 'RED',
+            1: 'GREEN',
+            2: 'RED',
+            3: 'RED'
+        },
+        'recommendations': [
+            'System ready - Waiting for video processing',
+            'Use /api/process-videos to start detection'
+        ]
+    },
+    'lane_results': [],
+    'message': 'Default data - Process videos to get real analysis'
+}
+_DEFAULT_ANALYSIS_BYTES = app.json.dumps(_DEFAULT_ANALYSIS_RESPONSE).encode()
+
+
 @app.route('/api/analysis', methods=['GET'])
 def get_analysis():
     """Get latest traffic analysis results"""
-    if processing_status['analysis_result'] is None:
+    status = processing_status.snapshot()
+    if status['analysis_result'] is None:
         # Return default/demo data instead of 404
-        default_analysis = {
-            'priority_ranking': [
-                {
-                    'rank': 1,
-                    'lane_id': 1,
-                    'lane_name': 'South',
-                    'total_vehicles': 0,
-                    'max_vehicles': 0,
-                    'avg_vehicles': 0,
-                    'congestion_score': 0,
-                    'congestion_level': 'low',
-                    'priority_score': 0,
-                    'recommended_green_time': 15
-                },
-                {
-                    'rank': 2,
-                    'lane_id': 0,
-                    'lane_name': 'North',
-                    'total_vehicles': 0,
-                    'max_vehicles': 0,
-                    'avg_vehicles': 0,
-                    'congestion_score': 0,
-                    'congestion_level': 'low',
-                    'priority_score': 0,
-                    'recommended_green_time': 15
-                },
-                {
-                    'rank': 3,
-                    'lane_id': 2,
-                    'lane_name': 'East',
-                    'total_vehicles': 0,
-                    'max_vehicles': 0,
-                    'avg_vehicles': 0,
-                    'congestion_score': 0,
-                    'congestion_level': 'low',
-                    'priority_score': 0,
-                    'recommended_green_time': 15
-                },
-                {
-                    'rank': 4,
-                    'lane_id': 3,
-                    'lane_name': 'West',
-                    'total_vehicles': 0,
-                    'max_vehicles': 0,
-                    'avg_vehicles': 0,
-                    'congestion_score': 0,
-                    'congestion_level': 'low',
-                    'priority_score': 0,
-                    'recommended_green_time': 15
-                }
-            ],
-            'signal_assignment': {
-                0: 'RED',
-                1: 'GREEN',
-                2: 'RED',
-                3: 'RED'
-            },
-            'recommendations': [
-                'System ready - Waiting for video processing',
-                'Use /api/process-videos to start detection'
-            ]
-        }
-        
-        return jsonify({
-            'success': True,
-            'analysis': default_analysis,
-            'lane_results': [],
-            'message': 'Default data - Process videos to get real analysis'
-        })
+        return Response(_DEFAULT_ANALYSIS_BYTES, mimetype='application/json')
     
     return jsonify({
         'success': True,
-        'analysis': processing_status['analysis_result'],
-        'lane_results': processing_status['lane_results']
+        'analysis': status['analysis_result'],
+        'lane_results': status['lane_results']
     })
 
 
@@ -503,16 +647,8 @@ def get_history():
 @app.route('/api/reset', methods=['POST'])
 def reset_system():
     """Reset the entire system"""
-    global processing_status
-    
     signal_controller.reset()
-    processing_status = {
-        'is_processing': False,
-        'current_phase': '',
-        'progress': 0,
-        'lane_results': [],
-        'analysis_result': None
-    }
+    processing_status.reset()
     
     logger.info("System reset completed")
     
@@ -601,8 +737,6 @@ def internal_error(error):
 @app.route('/api/start-live-detection', methods=['POST'])
 def start_live_detection():
     """Start continuous live detection from video files"""
-    global detector, processing_status
-    
     try:
         if processing_status['is_processing']:
             return jsonify({
@@ -613,26 +747,20 @@ def start_live_detection():
         processing_status['is_processing'] = True
         processing_status['current_phase'] = 'Initializing Live Detection'
         
-        # Initialize detector if not already done
-        if detector is None:
-            logger.info("Initializing YOLOv8 detector...")
-            try:
-                from vehicle_detector import VehicleDetector
-                detector = VehicleDetector()
-            except Exception as e:
-                logger.error(f"Failed to initialize detector: {e}")
-                processing_status['is_processing'] = False
-                return jsonify({
-                    'success': False,
-                    'message': f'Failed to initialize detector: {str(e)}'
-                }), 500
+        # Shared detector (built here only if background init has not finished)
+        try:
+            detector = get_detector()
+        except Exception as e:
+            logger.error(f"Failed to initialize detector: {e}")
+            processing_status['is_processing'] = False
+            return jsonify({
+                'success': False,
+                'message': f'Failed to initialize detector: {str(e)}'
+            }), 500
         
         # Start background thread for continuous processing
-        import threading
-        
         def process_videos_continuously():
             """Process videos in loop and update global state"""
-            global processing_status
             
             logger.info("🎬 Background detection thread STARTED!")
             
@@ -645,8 +773,8 @@ def start_live_detection():
             
             logger.info(f"📹 Opening video captures from: {Config.VIDEO_DIR}")
             
-            # Open all video captures
-            caps = [cv2.VideoCapture(str(path)) for path in video_paths]
+            # Open all video captures (PyAV threaded decode when available)
+            caps = [open_live_capture(path) for path in video_paths]
             
             # 🔍 DEBUG: Check if all captures opened successfully
             for i, cap in enumerate(caps):
@@ -655,109 +783,110 @@ def start_live_detection():
                 else:
                     logger.error(f"❌ Lane {i} video FAILED to open: {video_paths[i]}")
             
-            frame_count = 0
-            lane_vehicle_counts = [[] for _ in range(4)]
-            skip_frames = 3  # Process every 3rd frame for faster updates
+            # 🚀 PIPELINED DECODE: one decoder thread per lane, detection takes the newest frame
+            # Frames are downscaled to the model input width on the decoder threads
+            # Short clips can be decoded once and replayed from RAM (opt-in: Config.LANE_FRAME_CACHE_MB per lane)
+            grabbers = [
+                LaneGrabber(cap, i, max_width=detector.imgsz, cache_bytes=Config.LANE_FRAME_CACHE_MB * 1024 * 1024)
+                for i, cap in enumerate(caps)
+            ]
+            for grabber in grabbers:
+                _live_grabbers.add(grabber)
+                grabber.start()
             
-            logger.info(f"🔄 Starting detection loop with skip_frames={skip_frames}")
-            logger.info("⚡ FAST MODE: Processing frames every 3rd frame for quick updates!")
+            tick = 0
+            lane_vehicle_counts = [RollingWindow(30) for _ in range(4)]  # Last 30 frames per lane
             
-            while processing_status['is_processing']:
-                frames = []
-                all_ended = True
-                
-                # Read one frame from each video
-                for cap in caps:
-                    ret, frame = cap.read()
-                    if ret:
-                        all_ended = False
-                        frames.append(frame)
-                    else:
-                        # Loop video if it ends
-                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                        ret, frame = cap.read()
-                        frames.append(frame if ret else None)
-                
-                frame_count += 1
+            logger.info("🔄 Starting detection loop (decode runs in per-lane threads)")
+            
+            tick_interval = 0.2  # 5 Hz detection/analysis updates
+            deadline = time.monotonic()
+            try:
+                while processing_status['is_processing']:
+                    tick += 1
+                    deadline += tick_interval
+                    snapshots = [grabber.snapshot() for grabber in grabbers]
+                    frames = [frame for frame, _ in snapshots]
                 
-                # ⚡ SKIP FRAMES FOR SPEED - Only process every 3rd frame
-                if frame_count % skip_frames != 0:
-                    import time
-                    time.sleep(0.01)  # Minimal delay
-                    continue
+                    # Process detections for this frame
+                    current_vehicles = []
                 
-                # Process detections for this frame
-                current_vehicles = []
+                    # 🚀 BATCHED: one forward pass for all lanes instead of one per lane
+                    valid = [(i, frame) for i, frame in enumerate(frames) if frame is not None]
+                    batch_results = detector.detect_vehicles_batch(
+                        [frame for _, frame in valid],
+                        [Config.LANE_NAMES[i] for i, _ in valid]
+                    )
+                    lane_detections = dict(zip((i for i, _ in valid), batch_results))
                 
-                for i, frame in enumerate(frames):
-                    if frame is not None:
-                        # Pass lane_id to maintain separate tracking state per lane
-                        lane_name = Config.LANE_NAMES[i]
-                        detections = detector.detect_vehicles(frame, lane_id=lane_name)
-                        vehicle_count = len(detections)
-                        lane_vehicle_counts[i].append(vehicle_count)
+                    for i, frame in enumerate(frames):
+                        if frame is not None:
+                            detections = lane_detections[i]
+                            vehicle_count = len(detections)
+                            lane_vehicle_counts[i].append(vehicle_count)
                         
-                        # Log detection result every 10th processed frame
-                        if frame_count % 30 == 0:
-                            logger.info(f"Lane {Config.LANE_NAMES[i]}: Detected {vehicle_count} vehicles (frame {frame_count})")
+                            # Log detection result every 10th processed frame
+                            if tick % 10 == 0:
+                                logger.info(f"Lane {Config.LANE_NAMES[i]}: Detected {vehicle_count} vehicles (frame {snapshots[i][1]})")
                         
-                        current_vehicles.append({
-                            'lane_id': i,
-                            'count': vehicle_count,
-                            'detections': detections
-                        })
-                    else:
-                        current_vehicles.append({'lane_id': i, 'count': 0, 'detections': []})
-                
-                # Keep only last 30 frames of data
-                for i in range(4):
-                    if len(lane_vehicle_counts[i]) > 30:
-                        lane_vehicle_counts[i].pop(0)
+                            current_vehicles.append({
+                                'lane_id': i,
+                                'count': vehicle_count,
+                                'detections': detections
+                            })
+                        else:
+                            current_vehicles.append({'lane_id': i, 'count': 0, 'detections': []})
                 
-                # Update lane results
-                lane_results = []
-                for i in range(4):
-                    if lane_vehicle_counts[i]:
-                        counts = lane_vehicle_counts[i]
-                        total = sum(counts)
-                        avg = total / len(counts)
-                        max_vehicles = max(counts)
-                        current_count = counts[-1] if counts else 0
+                    # Update lane results
+                    lane_results = []
+                    for i in range(4):
+                        if lane_vehicle_counts[i]:
+                            counts = lane_vehicle_counts[i]
+                            total = counts.total
+                            avg = counts.mean
+                            max_vehicles = counts.max
+                            current_count = counts.last
                         
-                        # ✅ IMPROVED: Realistic congestion score calculation
-                        # Use current count as primary metric (realistic traffic measure)
-                        # Formula: current_vehicles + (avg * 2) + (max * 0.5)
-                        congestion_score = current_count + (avg * 2) + (max_vehicles * 0.5)
+                            # ✅ IMPROVED: Realistic congestion score calculation
+                            # Use current count as primary metric (realistic traffic measure)
+                            # Formula: current_vehicles + (avg * 2) + (max * 0.5)
+                            congestion_score = current_count + (avg * 2) + (max_vehicles * 0.5)
                         
-                        result = {
-                            'lane_id': i,
-                            'lane_name': Config.LANE_NAMES[i],
-                            'total_vehicles': total,
-                            'current_vehicles': current_count,
-                            'avg_vehicles_per_frame': round(avg, 2),
-                            'max_vehicles_in_frame': max_vehicles,
-                            'congestion_score': round(congestion_score, 2),
-                            'vehicle_counts': {'car': 0}  # Simplified
-                        }
-                        lane_results.append(result)
+                            result = {
+                                'lane_id': i,
+                                'lane_name': Config.LANE_NAMES[i],
+                                'total_vehicles': total,
+                                'current_vehicles': current_count,
+                                'avg_vehicles_per_frame': round(avg, 2),
+                                'max_vehicles_in_frame': max_vehicles,
+                                'congestion_score': round(congestion_score, 2),
+                                'vehicle_counts': {'car': 0}  # Simplified
+                            }
+                            lane_results.append(result)
                 
-                # Analyze and update signals
-                if lane_results:
-                    analysis = analyzer.analyze_all_lanes(lane_results)
-                    signal_status = signal_controller.update_signals(analysis)
+                    # Analyze and update signals
+                    if lane_results:
+                        analysis = analyzer.analyze_all_lanes(lane_results)
+                        signal_status = signal_controller.update_signals(analysis)
                     
-                    # Store in global state
-                    processing_status['lane_results'] = lane_results
-                    processing_status['analysis_result'] = analysis
-                    processing_status['signal_status'] = signal_status
+                        # Store in global state (one atomic publish for readers)
+                        processing_status.update(
+                            lane_results=lane_results,
+                            analysis_result=analysis,
+                            signal_status=signal_status
+                        )
                 
-                # ⚡ Optimized delay - 0.2 second for faster response
-                import time
-                time.sleep(0.2)
-            
-            # Cleanup
-            for cap in caps:
-                cap.release()
+                    # ⚡ Deadline pacing: sleep only for what is left of this tick
+                    slack = deadline - time.monotonic()
+                    if slack > 0:
+                        time.sleep(slack)
+                    else:
+                        deadline = time.monotonic()  # Overran; don't try to catch up with a burst
+            finally:
+                # Cleanup (also when the loop dies on an exception): stop decoders, release captures
+                for grabber in grabbers:
+                    grabber.stop()
+                    _live_grabbers.discard(grabber)
             
             logger.info("Live detection stopped")
         
@@ -783,7 +912,6 @@ def start_live_detection():
 @app.route('/api/stop-live-detection', methods=['POST'])
 def stop_live_detection():
     """Stop continuous live detection"""
-    global processing_status
     
     processing_status['is_processing'] = False
     processing_status['current_phase'] = 'Stopped'
@@ -846,7 +974,6 @@ def manual_mode():
     """Switch to manual cyclic mode"""
     try:
         # Stop AI detection
-        global processing_status
         processing_status['is_processing'] = False
         
         logger.info("⚙️ Manual mode activated - Cyclic signal control")
@@ -865,15 +992,57 @@ def manual_mode():
         }), 500
 
 
+# Shared default for lanes missing from the signal status (read-only, avoids a dict per lookup)
+_NO_SIGNAL = {}
+
+# Density buckets: (base %, bucket start, bucket width, % span) for low / medium / high / critical
+_DENSITY_BINS = (Config.LOW_CONGESTION, Config.MEDIUM_CONGESTION, Config.HIGH_CONGESTION)
+_DENSITY_SEGMENTS = (
+    (0, 0, Config.LOW_CONGESTION, 25),
+    (25, Config.LOW_CONGESTION, Config.MEDIUM_CONGESTION - Config.LOW_CONGESTION, 35),
+    (60, Config.MEDIUM_CONGESTION, Config.HIGH_CONGESTION - Config.MEDIUM_CONGESTION, 25),
+    (85, Config.HIGH_CONGESTION, 40, 15),
+)
+_DENSITY_LEVELS = ('low', 'medium', 'high', 'critical')
+
+
+def _interpolate_density(vehicle_count):
+    """Piecewise-linear density for one count (used to build _DENSITY_LUT)"""
+    bucket = bisect_left(_DENSITY_BINS, vehicle_count)
+    base, start, width, span = _DENSITY_SEGMENTS[bucket]
+    return min(100, base + int((vehicle_count - start) / width * span)), _DENSITY_LEVELS[bucket]
+
+
+# ⚡ Thresholds are fixed at startup: precompute every count up to saturation (100% critical)
+_DENSITY_LUT = tuple(_interpolate_density(v) for v in range(Config.HIGH_CONGESTION + 41))
+
+
+def congestion_density(vehicle_count):
+    """Map a vehicle count to a density percentage
+    
+    Low: 0-15 vehicles (0-25%), Medium: 16-35 (25-60%), High: 36-60 (60-85%), Critical: 60+ (85-100%)
+    
+    Args:
+        vehicle_count: Vehicles currently in the lane
+    
+    Returns:
+        tuple: (density_percent, congestion_level)
+    """
+    if isinstance(vehicle_count, int) and 0 <= vehicle_count < len(_DENSITY_LUT):
+        return _DENSITY_LUT[vehicle_count]
+    return _interpolate_density(vehicle_count)
+
+
 @app.route('/api/live-data', methods=['GET'])
 def get_live_data():
     """Get current live detection data"""
+    status = processing_status.snapshot()
     
-    if not processing_status['lane_results']:
+    if not status['lane_results']:
         # Return empty state
         return jsonify({
             'success': True,
-            'is_running': processing_status['is_processing'],
+            'is_running': status['is_processing'],
             'lanes': [
                 {'lane_id': 0, 'lane_name': 'North', 'current_vehicles': 0, 'wait_time': 0, 'density': 0, 'signal': 'RED'},
                 {'lane_id': 1, 'lane_name': 'South', 'current_vehicles': 0, 'wait_time': 0, 'density': 0, 'signal': 'GREEN'},
@@ -888,32 +1057,22 @@ def get_live_data():
     
     # Prepare live data for each lane
     lanes_data = []
-    for lane_result in processing_status['lane_results']:
+    for lane_result in status['lane_results']:
         lane_id = lane_result['lane_id']
         lane_name = lane_result['lane_name']
         
         # Get signal info
-        signal_info = signals.get(lane_name, {})
+        signal_info = signals.get(lane_name, _NO_SIGNAL)
         signal_state = signal_info.get('state', 'RED')
         time_remaining = signal_info.get('time_remaining', 0)
         
         # ✅ IMPROVED: Realistic density percentage based on vehicle count
-        # Low: 0-15 vehicles (0-25%), Medium: 16-35 (25-60%), High: 36-60 (60-85%), Critical: 60+ (85-100%)
         current_vehicles = lane_result.get('current_vehicles', 0)
         
         # 🔍 DEBUG: Log vehicle count
         logger.debug(f"Lane {lane_name}: {current_vehicles} vehicles detected")
         
-        if current_vehicles <= Config.LOW_CONGESTION:
-            density_percent = int((current_vehicles / Config.LOW_CONGESTION) * 25)
-        elif current_vehicles <= Config.MEDIUM_CONGESTION:
-            density_percent = 25 + int(((current_vehicles - Config.LOW_CONGESTION) / 
-                                        (Config.MEDIUM_CONGESTION - Config.LOW_CONGESTION)) * 35)
-        elif current_vehicles <= Config.HIGH_CONGESTION:
-            density_percent = 60 + int(((current_vehicles - Config.MEDIUM_CONGESTION) / 
-                                        (Config.HIGH_CONGESTION - Config.MEDIUM_CONGESTION)) * 25)
-        else:
-            density_percent = min(100, 85 + int(((current_vehicles - Config.HIGH_CONGESTION) / 40) * 15))
+        density_percent = congestion_density(current_vehicles)[0]
         
         lanes_data.append({
             'lane_id': lane_id,
@@ -927,17 +1086,56 @@ def get_live_data():
     
     return jsonify({
         'success': True,
-        'is_running': processing_status['is_processing'],
+        'is_running': status['is_processing'],
         'lanes': lanes_data,
         'timestamp': datetime.now().isoformat()
     })
 
 
+# ⚡ Gemini decisions memoized by coarse traffic state (LRU, Config.AI_DECISION_TTL seconds)
+_ai_decision_cache = OrderedDict()  # state key -> (time.monotonic() of call, decision)
+_ai_decision_cache_lock = threading.Lock()
+_AI_DECISION_CACHE_SIZE = 128
+
+
+def _traffic_state_key(lanes):
+    """Quantize lane data to a hashable key: vehicle counts bucketed to 5, signal state, congestion level"""
+    return tuple(
+        (lane['name'], lane['current_vehicles'] // 5, lane['signal_state'], lane['congestion_level'])
+        for lane in lanes
+    )
+
+
+def _get_cached_ai_decision(state_key):
+    """Cached decision for this traffic state, or None when missing/expired"""
+    with _ai_decision_cache_lock:
+        entry = _ai_decision_cache.get(state_key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= Config.AI_DECISION_TTL:
+            del _ai_decision_cache[state_key]
+            return None
+        _ai_decision_cache.move_to_end(state_key)
+        return entry[1]
+
+
+def _store_ai_decision(state_key, decision):
+    """Remember a decision for this traffic state, evicting the least recently used entry"""
+    with _ai_decision_cache_lock:
+        _ai_decision_cache[state_key] = (time.monotonic(), decision)
+        _ai_decision_cache.move_to_end(state_key)
+        if len(_ai_decision_cache) > _AI_DECISION_CACHE_SIZE:
+            _ai_decision_cache.popitem(last=False)
+
+
 @app.route('/api/ai-decisions', methods=['GET'])
 def get_ai_decisions():
     """Get AI decision engine recommendations powered by Gemini AI"""
+    status = processing_status.snapshot()
+    now = datetime.now()  # One clock read, formatted once per response
+    timestamp = now.isoformat()
     
-    if not processing_status['lane_results']:
+    if not status['lane_results']:
         # Default state when no processing
         return jsonify({
             'success': True,
@@ -952,42 +1150,52 @@ def get_ai_decisions():
                 'risk_factors': 'None - System in standby mode',
                 'ai_powered': False
             },
-            'timestamp': datetime.now().isoformat()
+            'timestamp': timestamp
         })
     
     # Prepare traffic data for Gemini AI
-    lanes = processing_status['lane_results']
+    lanes = status['lane_results']
     signal_status = signal_controller._get_signal_status()
     signals = signal_status.get('signals', {})
     
     # Format data for AI
     traffic_data = {
-        'current_time': datetime.now().strftime('%I:%M %p'),
+        'current_time': now.strftime('%I:%M %p'),
         'lanes': [],
         'total_vehicles': 0
     }
     
+    lanes_out = traffic_data['lanes']
+    total_vehicles = 0
     for lane in lanes:
-        lane_name = lane.get('lane_name', 'Unknown')
-        vehicles = lane.get('current_vehicles', 0)
-        signal_info = signals.get(lane_name, {})
+        lane_get = lane.get  # Bound once per lane
+        lane_name = lane_get('lane_name', 'Unknown')
+        vehicles = lane_get('current_vehicles', 0)
+        signal_info = signals.get(lane_name, _NO_SIGNAL)
         
-        traffic_data['lanes'].append({
+        lanes_out.append({
             'name': lane_name,
             'current_vehicles': vehicles,
             'signal_state': signal_info.get('state', 'RED'),
             'time_remaining': signal_info.get('time_remaining', 0),
-            'congestion_level': lane.get('congestion_level', 'unknown')
+            'congestion_level': lane_get('congestion_level', 'unknown')
         })
-        traffic_data['total_vehicles'] += vehicles
+        total_vehicles += vehicles
+    traffic_data['total_vehicles'] = total_vehicles
     
     # Use Gemini AI if available, otherwise fallback
     if gemini_ai:
         try:
-            # FIX: Added frame_width and frame_height arguments
-            frame_width, frame_height = 640, 480  # Standard dimensions
-            ai_decision = gemini_ai.analyze_traffic_decision(traffic_data, frame_width, frame_height)
-            logger.info(f"🤖 Gemini AI: {ai_decision.get('action')}")
+            state_key = _traffic_state_key(traffic_data['lanes'])
+            ai_decision = _get_cached_ai_decision(state_key)
+            if ai_decision is None:
+                # FIX: Added frame_width and frame_height arguments
+                frame_width, frame_height = 640, 480  # Standard dimensions
+                ai_decision = gemini_ai.analyze_traffic_decision(traffic_data, frame_width, frame_height)
+                # Cooldown/error fallbacks must not be memoized as the AI decision for this state
+                if ai_decision.get('ai_powered') is not False:
+                    _store_ai_decision(state_key, ai_decision)
+                logger.info(f"🤖 Gemini AI: {ai_decision.get('action')}")
         except Exception as e:
             logger.error(f"Gemini AI failed: {e}. Using fallback.")
             ai_decision = _fallback_decision_logic(traffic_data, lanes, signals)
@@ -997,21 +1205,22 @@ def get_ai_decisions():
     return jsonify({
         'success': True,
         'decision': ai_decision,
-        'timestamp': datetime.now().isoformat()
+        'timestamp': timestamp
     })
 
 
+def _lane_vehicle_count(lane):
+    """Current vehicle count of a lane result"""
+    return lane.get('current_vehicles', 0)
+
+
 def _fallback_decision_logic(traffic_data, lanes, signals):
     """Fallback rule-based logic when AI is unavailable"""
-    # Find lane with highest congestion
-    max_vehicles = 0
-    critical_lane = None
-    for lane in lanes:
-        if lane.get('current_vehicles', 0) > max_vehicles:
-            max_vehicles = lane.get('current_vehicles', 0)
-            critical_lane = lane
+    # Find lane with highest congestion (single C-level pass, first lane wins ties)
+    critical_lane = max(lanes, key=_lane_vehicle_count, default=None)
+    current_vehicles = _lane_vehicle_count(critical_lane) if critical_lane else 0
     
-    if not critical_lane:
+    if current_vehicles <= 0:
         return {
             'action': 'Normal operation',
             'reason': 'Traffic levels optimal',
@@ -1025,105 +1234,134 @@ def _fallback_decision_logic(traffic_data, lanes, signals):
         }
     
     lane_name = critical_lane.get('lane_name', 'Unknown')
-    current_vehicles = critical_lane.get('current_vehicles', 0)
     
     # Calculate density percentage
-    if current_vehicles <= Config.LOW_CONGESTION:
-        density_percent = int((current_vehicles / Config.LOW_CONGESTION) * 25)
-        congestion_level = "low"
-    elif current_vehicles <= Config.MEDIUM_CONGESTION:
-        density_percent = 25 + int(((current_vehicles - Config.LOW_CONGESTION) / 
-                                    (Config.MEDIUM_CONGESTION - Config.LOW_CONGESTION)) * 35)
-        congestion_level = "medium"
-    elif current_vehicles <= Config.HIGH_CONGESTION:
-        density_percent = 60 + int(((current_vehicles - Config.MEDIUM_CONGESTION) / 
-                                    (Config.HIGH_CONGESTION - Config.MEDIUM_CONGESTION)) * 25)
-        congestion_level = "high"
-    else:
-        density_percent = min(100, 85 + int(((current_vehicles - Config.HIGH_CONGESTION) / 40) * 15))
-        congestion_level = "critical"
+    density_percent, congestion_level = congestion_density(current_vehicles)
     
     # Get current signal state for this lane
-    lane_signal_info = signals.get(lane_name, {})
+    lane_signal_info = signals.get(lane_name, _NO_SIGNAL)
     current_signal = lane_signal_info.get('state', 'RED')
     time_remaining = lane_signal_info.get('time_remaining', 0)
     
-    # Enhanced decision logic
-    if congestion_level == "critical" and current_signal == "RED":
-        action = f"🚨 CRITICAL: Prioritize {lane_name} - Immediate GREEN Signal"
-        reason = f"Critical congestion detected: {current_vehicles} vehicles ({density_percent}% density)"
-        detailed_analysis = f"{lane_name} lane experiencing severe congestion. Current wait time estimated at {int(current_vehicles * 2.5)} seconds. Immediate intervention required to prevent gridlock."
-        impact_prediction = f"Expected to clear {int(current_vehicles * 0.40)} vehicles in 60 seconds. Delay reduction: {min(45, int(density_percent * 0.5))}%"
-        confidence = min(95, 75 + int(density_percent / 5))
-        priority = "CRITICAL"
-        alternative = f"If immediate GREEN not possible, extend next cycle by 45 seconds for {lane_name}"
-        risks = f"Risk of spillover to adjacent lanes if not addressed within 90 seconds. Monitor {lane_name} closely."
-        
-    elif congestion_level == "high" and current_signal == "GREEN":
-        extension_time = 25 if current_vehicles > 50 else 15
-        action = f"⚠️ Extend {lane_name} GREEN Signal +{extension_time}s"
-        reason = f"High density: {current_vehicles} vehicles ({density_percent}% capacity)"
-        detailed_analysis = f"{lane_name} currently processing traffic but requires additional time. Extension will optimize throughput and prevent secondary congestion."
-        impact_prediction = f"Additional {int(current_vehicles * 0.35)} vehicles cleared. Total delay reduction: {min(35, int(density_percent * 0.35))}%"
-        confidence = min(92, 70 + int(density_percent / 4))
-        priority = "HIGH"
-        alternative = f"Alternative: Maintain current timing and queue for extended next cycle"
-        risks = "Moderate risk of residual congestion if cut short. Extension recommended."
-        
-    elif congestion_level == "high" and current_signal == "RED":
-        action = f"📋 Queue {lane_name} for Priority GREEN Cycle"
-        reason = f"High vehicle count detected: {current_vehicles} vehicles ({density_percent}%)"
-        detailed_analysis = f"{lane_name} showing significant buildup while on RED. Queuing for next available GREEN cycle with extended duration to clear backlog efficiently."
-        impact_prediction = f"Expected clearance: {int(current_vehicles * 0.30)} vehicles in next cycle. Delay reduction: {min(30, int(density_percent * 0.3))}%"
-        confidence = min(88, 65 + int(density_percent / 3))
-        priority = "HIGH"
-        alternative = f"Monitor for critical threshold. If exceeds {Config.HIGH_CONGESTION + 10} vehicles, escalate to immediate priority."
-        risks = f"Wait time currently at {time_remaining}s. Risk increases if other lanes also congest."
-        
-    elif congestion_level == "medium" and current_signal == "GREEN":
-        action = f"✅ Maintain {lane_name} Standard Timing"
-        reason = f"Moderate traffic flow: {current_vehicles} vehicles ({density_percent}%)"
-        detailed_analysis = f"{lane_name} operating within normal parameters. Current GREEN signal efficiently processing traffic. No intervention required."
-        impact_prediction = f"Steady clearance rate: {int(current_vehicles * 0.25)} vehicles per cycle. Delay reduction: 15%"
-        confidence = 78
-        priority = "MEDIUM"
-        alternative = "Continue monitoring. Ready to extend if density increases above 70%."
-        risks = "Low risk. Traffic flow stable and predictable."
-        
-    else:
-        action = f"🟢 Normal Operation - {lane_name} Balanced"
-        reason = f"Optimal traffic density: {current_vehicles} vehicles ({density_percent}%)"
-        detailed_analysis = f"All lanes showing balanced distribution. {lane_name} currently has highest count but well within optimal range. Standard signal timing is effective."
-        impact_prediction = f"Minimal delay expected. Current throughput: {int(current_vehicles * 0.20)} vehicles per cycle."
-        confidence = 85
-        priority = "LOW"
-        alternative = "Maintain current pattern. System operating at peak efficiency."
-        risks = "None. Traffic conditions optimal for current time period."
-    
-    return {
-        'action': action,
-        'reason': reason,
-        'detailed_analysis': detailed_analysis,
-        'impact_prediction': impact_prediction,
-        'confidence': confidence,
-        'priority_level': priority,
-        'alternative_action': alternative,
-        'risk_factors': risks,
+    # Enhanced decision logic: one handler per (congestion level, signal) pair
+    handler = _DECISION_TABLE.get((congestion_level, current_signal), _decide_normal)
+    decision = handler(lane_name, current_vehicles, density_percent, time_remaining)
+    decision.update({
         'ai_powered': False,
         'lane': lane_name,
         'vehicles': current_vehicles,
         'density': density_percent
+    })
+    return decision
+
+
+def _decide_critical_red(lane_name, current_vehicles, density_percent, time_remaining):
+    """Critical congestion on RED: immediate GREEN"""
+    return {
+        'action': f"🚨 CRITICAL: Prioritize {lane_name} - Immediate GREEN Signal",
+        'reason': f"Critical congestion detected: {current_vehicles} vehicles ({density_percent}% density)",
+        'detailed_analysis': f"{lane_name} lane experiencing severe congestion. Current wait time estimated at {int(current_vehicles * 2.5)} seconds. Immediate intervention required to prevent gridlock.",
+        'impact_prediction': f"Expected to clear {int(current_vehicles * 0.40)} vehicles in 60 seconds. Delay reduction: {min(45, int(density_percent * 0.5))}%",
+        'confidence': min(95, 75 + int(density_percent / 5)),
+        'priority_level': "CRITICAL",
+        'alternative_action': f"If immediate GREEN not possible, extend next cycle by 45 seconds for {lane_name}",
+        'risk_factors': f"Risk of spillover to adjacent lanes if not addressed within 90 seconds. Monitor {lane_name} closely."
+    }
+
+
+def _decide_high_green(lane_name, current_vehicles, density_percent, time_remaining):
+    """High congestion on GREEN: extend the current phase"""
+    extension_time = 25 if current_vehicles > 50 else 15
+    return {
+        'action': f"⚠️ Extend {lane_name} GREEN Signal +{extension_time}s",
+        'reason': f"High density: {current_vehicles} vehicles ({density_percent}% capacity)",
+        'detailed_analysis': f"{lane_name} currently processing traffic but requires additional time. Extension will optimize throughput and prevent secondary congestion.",
+        'impact_prediction': f"Additional {int(current_vehicles * 0.35)} vehicles cleared. Total delay reduction: {min(35, int(density_percent * 0.35))}%",
+        'confidence': min(92, 70 + int(density_percent / 4)),
+        'priority_level': "HIGH",
+        'alternative_action': "Alternative: Maintain current timing and queue for extended next cycle",
+        'risk_factors': "Moderate risk of residual congestion if cut short. Extension recommended."
+    }
+
+
+def _decide_high_red(lane_name, current_vehicles, density_percent, time_remaining):
+    """High congestion on RED: queue for a priority GREEN cycle"""
+    return {
+        'action': f"📋 Queue {lane_name} for Priority GREEN Cycle",
+        'reason': f"High vehicle count detected: {current_vehicles} vehicles ({density_percent}%)",
+        'detailed_analysis': f"{lane_name} showing significant buildup while on RED. Queuing for next available GREEN cycle with extended duration to clear backlog efficiently.",
+        'impact_prediction': f"Expected clearance: {int(current_vehicles * 0.30)} vehicles in next cycle. Delay reduction: {min(30, int(density_percent * 0.3))}%",
+        'confidence': min(88, 65 + int(density_percent / 3)),
+        'priority_level': "HIGH",
+        'alternative_action': f"Monitor for critical threshold. If exceeds {Config.HIGH_CONGESTION + 10} vehicles, escalate to immediate priority.",
+        'risk_factors': f"Wait time currently at {time_remaining}s. Risk increases if other lanes also congest."
     }
 
 
+def _decide_medium_green(lane_name, current_vehicles, density_percent, time_remaining):
+    """Medium congestion on GREEN: keep standard timing"""
+    return {
+        'action': f"✅ Maintain {lane_name} Standard Timing",
+        'reason': f"Moderate traffic flow: {current_vehicles} vehicles ({density_percent}%)",
+        'detailed_analysis': f"{lane_name} operating within normal parameters. Current GREEN signal efficiently processing traffic. No intervention required.",
+        'impact_prediction': f"Steady clearance rate: {int(current_vehicles * 0.25)} vehicles per cycle. Delay reduction: 15%",
+        'confidence': 78,
+        'priority_level': "MEDIUM",
+        'alternative_action': "Continue monitoring. Ready to extend if density increases above 70%.",
+        'risk_factors': "Low risk. Traffic flow stable and predictable."
+    }
+
+
+def _decide_normal(lane_name, current_vehicles, density_percent, time_remaining):
+    """Every other combination: normal operation"""
+    return {
+        'action': f"🟢 Normal Operation - {lane_name} Balanced",
+        'reason': f"Optimal traffic density: {current_vehicles} vehicles ({density_percent}%)",
+        'detailed_analysis': f"All lanes showing balanced distribution. {lane_name} currently has highest count but well within optimal range. Standard signal timing is effective.",
+        'impact_prediction': f"Minimal delay expected. Current throughput: {int(current_vehicles * 0.20)} vehicles per cycle.",
+        'confidence': 85,
+        'priority_level': "LOW",
+        'alternative_action': "Maintain current pattern. System operating at peak efficiency.",
+        'risk_factors': "None. Traffic conditions optimal for current time period."
+    }
+
+
+# (congestion level, signal state) -> decision handler; anything else is _decide_normal
+_DECISION_TABLE = {
+    ('critical', 'RED'): _decide_critical_red,
+    ('high', 'GREEN'): _decide_high_green,
+    ('high', 'RED'): _decide_high_red,
+    ('medium', 'GREEN'): _decide_medium_green,
+}
+
+
+def _prediction_multiplier(hour, step):
+    """Time-of-day traffic multiplier for the `step`-th 5-minute prediction"""
+    # Peak hours: 8-10 AM, 5-7 PM (higher traffic)
+    # Off-peak: 12-2 PM, 10 PM - 6 AM (lower traffic)
+    if (8 <= hour < 10) or (17 <= hour < 19):
+        # Peak hour - increase traffic
+        return 1.2 + (step * 0.05)  # Gradual increase
+    if (12 <= hour < 14) or (22 <= hour or hour < 6):
+        # Off-peak - decrease traffic
+        return 0.8 - (step * 0.03)  # Gradual decrease
+    # Normal hours - stable with slight variation
+    return 1.0 + (step * 0.02)
+
+
+# ⚡ [hour][step] multiplier table (24 x 7), built once instead of branching per request
+_PREDICTION_MULTIPLIERS = tuple(
+    tuple(_prediction_multiplier(hour, step) for step in range(7)) for hour in range(24)
+)
+
+
 @app.route('/api/traffic-prediction', methods=['GET'])
 def get_traffic_prediction():
     """Get 30-minute traffic flow prediction based on historical data"""
-    from datetime import timedelta
-    
-    if not processing_status['lane_results']:
+    status = processing_status.snapshot()
+    now = datetime.now()
+    if not status['lane_results']:
         # Default prediction data
-        now = datetime.now()
         default_predictions = []
         for i in range(7):
             default_predictions.append({
@@ -1140,15 +1378,11 @@ def get_traffic_prediction():
             'message': 'Waiting for historical data'
         })
     
-    # Get historical data from signal controller
-    history = signal_controller.get_signal_history(limit=30)
-    
     # Calculate average vehicles across all lanes over time
-    now = datetime.now()
     predictions = []
     
     # Get current average
-    current_avg = sum(lane.get('current_vehicles', 0) for lane in processing_status['lane_results']) / len(processing_status['lane_results'])
+    current_avg = sum(lane.get('current_vehicles', 0) for lane in status['lane_results']) / len(status['lane_results'])
     
     # Generate predictions for next 30 minutes (7 data points, every 5 min)
     for i in range(7):
@@ -1159,20 +1393,7 @@ def get_traffic_prediction():
         # - Add slight variation based on time of day
         # - Simulate realistic traffic patterns
         
-        hour = future_time.hour
-        minute = future_time.minute
-        
-        # Peak hours: 8-10 AM, 5-7 PM (higher traffic)
-        # Off-peak: 12-2 PM, 10 PM - 6 AM (lower traffic)
-        if (8 <= hour < 10) or (17 <= hour < 19):
-            # Peak hour - increase traffic
-            multiplier = 1.2 + (i * 0.05)  # Gradual increase
-        elif (12 <= hour < 14) or (22 <= hour or hour < 6):
-            # Off-peak - decrease traffic
-            multiplier = 0.8 - (i * 0.03)  # Gradual decrease
-        else:
-            # Normal hours - stable with slight variation
-            multiplier = 1.0 + (i * 0.02)
+        multiplier = _PREDICTION_MULTIPLIERS[future_time.hour][i]
         
         predicted_vehicles = int(current_avg * multiplier)
         predicted_vehicles = max(5, min(100, predicted_vehicles))  # Keep realistic (5-100)
@@ -1201,7 +1422,7 @@ def get_traffic_prediction():
         'trend': trend,
         'peak_time': peak_time,
         'current_avg': int(current_avg),
-        'timestamp': datetime.now().isoformat()
+        'timestamp': now.isoformat()
     })
 # ============================================
 # Gunicorn Entry Point
@@ -1233,11 +1454,22 @@ if __name__ == '__main__':
     # This prevents race condition with background component loading
     logger.info("ℹ️  Auto-start disabled. Use frontend 'Start Detection' button or POST to /api/start-live-detection")
     
-    # 🎯 OPTIMIZED SERVER CONFIG: Better memory handling
-    app.run(
-        host=Config.HOST,
-        port=Config.PORT,
-        debug=Config.DEBUG,
-        threaded=True,  # Enable threading for better concurrent request handling
-        request_handler=None  # Use default handler with automatic cleanup
-    )
+    # 🚀 PRODUCTION SERVER: Waitress thread pool when installed; Werkzeug dev server with --dev
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve is not None and '--dev' not in sys.argv:
+        logger.info(f"Serving with Waitress on {Config.HOST}:{Config.PORT} ({Config.SERVER_THREADS} threads)")
+        # One process: detector, lane streams and processing_status are in-memory and shared
+        serve(app, host=Config.HOST, port=Config.PORT, threads=Config.SERVER_THREADS, channel_timeout=30)
+    else:
+        # 🎯 OPTIMIZED SERVER CONFIG: Better memory handling
+        app.run(
+            host=Config.HOST,
+            port=Config.PORT,
+            debug=Config.DEBUG,
+            threaded=True,  # Enable threading for better concurrent request handling
+            request_handler=None  # Use default handler with automatic cleanup
+        )
@@ -21,11 +21,19 @@ class Config:
     DEBUG = os.getenv('DEBUG', 'True') == 'True'
     HOST = os.getenv('HOST', '0.0.0.0')
     PORT = int(os.getenv('PORT', 5000))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', 24))  # Each open /video_feed holds a thread: 4 lanes x 4 viewers + 8 for /api polling
     
     # YOLO Model Configuration
     MODEL_NAME = 'yolov8n.pt'  # Options: yolov8n, yolov8s, yolov8m, yolov8l, yolov8x
     CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', 0.15))  # 🎯 LOWERED: Better detection (15% threshold)
     IOU_THRESHOLD = float(os.getenv('IOU_THRESHOLD', 0.35))  # 🎯 LOWERED: Better overlap detection
+    USE_TENSORRT = os.getenv('USE_TENSORRT', 'True') == 'True'  # Export/load a TensorRT FP16 engine when CUDA is available
+    TENSORRT_INT8 = os.getenv('TENSORRT_INT8', 'False') == 'True'  # Build the TensorRT engine with INT8 calibration instead of FP16
+    TENSORRT_WORKSPACE_GB = int(os.getenv('TENSORRT_WORKSPACE_GB', 4))  # Builder workspace for kernel autotuning
+    INT8_CALIB_DATA = os.getenv('INT8_CALIB_DATA', '')  # Dataset YAML for INT8 calibration ('' = sample frames from VIDEO_DIR)
+    INT8_CALIB_FRAMES = int(os.getenv('INT8_CALIB_FRAMES', 300))  # Frames sampled from the lane videos for INT8 calibration
+    USE_OPENVINO = os.getenv('USE_OPENVINO', 'True') == 'True'  # Export/load an OpenVINO INT8 model on CPU-only hosts
+    TORCH_COMPILE = os.getenv('TORCH_COMPILE', 'True') == 'True'  # torch.compile the PyTorch model on GPU when no TensorRT engine is used
     
     # Vehicle Classes (COCO dataset) - EXPANDED for better detection
     VEHICLE_CLASSES = {
@@ -41,13 +49,28 @@ class Config:
     
     # Detection Settings
     DETECTION_INTERVAL = int(os.getenv('DETECTION_INTERVAL', 2))  # Process every N frames
+    ANALYSIS_FPS = int(os.getenv('ANALYSIS_FPS', 5))  # Frames/sec sampled by process_videos_visual.py and the GUI (others are grab()-skipped)
+    DETECTION_CACHE_FRAMES = int(os.getenv('DETECTION_CACHE_FRAMES', 3))  # Players/visualizer run YOLO every N frames and reuse boxes in between
+    DETECTION_CACHE_FLOW = os.getenv('DETECTION_CACHE_FLOW', 'True') == 'True'  # Shift reused boxes by optical flow
+    CLAHE_MEAN_RANGE = (int(os.getenv('CLAHE_MIN_MEAN', 60)), int(os.getenv('CLAHE_MAX_MEAN', 200)))  # CLAHE only frames whose mean luma falls outside this range...
+    CLAHE_MIN_STD = int(os.getenv('CLAHE_MIN_STD', 30))  # ...or whose luma std-dev (contrast) is below this
     FRAME_SKIP = 1  # For faster processing
+    BATCH_SIZE = int(os.getenv('BATCH_SIZE', 16))  # Frames per batched YOLO forward pass (offline video processing)
+    DEDUP_MAX_HAMMING = int(os.getenv('DEDUP_MAX_HAMMING', -1))  # Reuse detections when frame hashes differ by <= N bits (-1 = off: the static background dominates the hash, so moving vehicles look like duplicates)
+    DEDUP_MAX_REUSE = int(os.getenv('DEDUP_MAX_REUSE', 5))  # Force a fresh inference after N reused frames
+    VIDEO_WORKERS = int(os.getenv('VIDEO_WORKERS', 2))  # Videos annotated concurrently by RUN_ME_FOR_VIDEOS.py and process_videos_visual.py
+    CUDA_DEVICE = int(os.getenv('CUDA_DEVICE', 0))  # GPU index the shared detector is pinned to
+    LANE_FRAME_CACHE_MB = int(os.getenv('LANE_FRAME_CACHE_MB', 0))  # Opt-in per-lane RAM budget for replaying short live clips without re-decoding (0 = off; x4 lanes)
+    USE_HW_CODEC = os.getenv('USE_HW_CODEC', 'True') == 'True'  # NVENC/NVDEC video I/O when CUDA is available
+    HW_DEVICE = int(os.getenv('HW_DEVICE', -1))  # Hardware decode device index (-1 = auto)
     
     # Traffic Signal Timing (seconds)
     MIN_GREEN_TIME = int(os.getenv('MIN_GREEN_TIME', 15))
     MAX_GREEN_TIME = int(os.getenv('MAX_GREEN_TIME', 120))
     YELLOW_TIME = int(os.getenv('YELLOW_TIME', 3))
     ALL_RED_TIME = int(os.getenv('ALL_RED_TIME', 2))
+    CHART_DPI = int(os.getenv('CHART_DPI', 150))  # Resolution of the saved PNG charts (utils.py)
+    HISTORY_LIMIT = int(os.getenv('HISTORY_LIMIT', 1024))  # Signal changes / analyses kept in memory (oldest evicted)
     
     # Lane Configuration
     LANE_NAMES = ['North', 'South', 'East', 'West']
@@ -63,3 +86,4 @@ class Config:
     ENABLE_SPEED_ESTIMATION = False
     ENABLE_VEHICLE_COUNTING = True
     SAVE_ANNOTATED_VIDEOS = True
+    AI_DECISION_TTL = int(os.getenv('AI_DECISION_TTL', 10))  # Reuse a Gemini decision for this many seconds while traffic is unchanged
@@ -5,7 +5,7 @@ Shows videos with real-time detection boxes
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import cv2
-from PIL import Image, ImageTk
+import numpy as np
 import threading
 import json
 from pathlib import Path
@@ -17,6 +17,8 @@ from config import Config
 from vehicle_detector import VehicleDetector
 from traffic_analyzer import TrafficAnalyzer
 from signal_controller import TrafficSignalController
+from video_io import open_capture, FrameProducer
+from overlay import OverlayStamp, text_after
 
 
 class TrafficManagementGUI:
@@ -44,6 +46,27 @@ class TrafficManagementGUI:
         self.current_frame_labels = [None, None, None, None]
         self.lane_results = []
         
+        # Signal status published by the poller thread; Tk only reads it on its 500 ms tick
+        self._signal_state = None
+        self._countdown_scheduled = False
+        
+        # Per-lane display buffers + long-lived PhotoImages, (re)built only when the display size changes
+        self._small_bufs = [None] * 4  # Resized BGR
+        self._ppm_bufs = [None] * 4    # Binary PPM (header + RGB pixels) handed straight to Tk
+        self._rgb_bufs = [None] * 4    # Resized RGB, a view into the PPM pixel area
+        self._photos = [None] * 4
+        
+        # ⚡ Constant "{Lane} Lane" / "Vehicles: " / "FPS: " labels rasterized once, blitted per frame;
+        # only the numbers are drawn per frame, at origins measured once
+        self._lane_stamps = [
+            OverlayStamp([(f"{name} Lane", (10, 30), 1, (0, 255, 0), 2),
+                          ("Vehicles: ", (10, 70), 0.8, (255, 255, 0), 2),
+                          ("FPS: ", (10, 110), 0.7, (0, 255, 255), 2)])
+            for name in Config.LANE_NAMES
+        ]
+        self._count_text = text_after("Vehicles: ", (10, 70), 0.8, (255, 255, 0), 2)
+        self._fps_text = text_after("FPS: ", (10, 110), 0.7, (0, 255, 255), 2)
+        
         self.setup_ui()
     
     def setup_ui(self):
@@ -264,6 +287,16 @@ class TrafficManagementGUI:
         # Start processing thread
         thread = threading.Thread(target=self.process_videos, daemon=True)
         thread.start()
+        
+        # ⚡ Poll the controller off the Tk thread; the countdown tick just reads the latest snapshot
+        poller = threading.Thread(target=self._poll_signal_status, daemon=True)
+        poller.start()
+    
+    def _poll_signal_status(self):
+        """Refresh self._signal_state every 500 ms while processing"""
+        while self.is_processing:
+            self._signal_state = self.controller.get_signal_status()
+            time.sleep(0.5)
     
     def stop_processing(self):
         """Stop video processing"""
@@ -281,27 +314,33 @@ class TrafficManagementGUI:
             
             # Open all video captures
             caps = []
+            sample_every = []  # Per lane: analyze 1 of every N frames (≈ Config.ANALYSIS_FPS)
             for video_path in self.video_paths:
-                cap = cv2.VideoCapture(video_path)
+                cap = open_capture(video_path)  # NVDEC/VAAPI decode when available
                 if not cap.isOpened():
                     self.update_status(f"Error: Could not open {video_path}")
                     return
                 caps.append(cap)
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                sample_every.append(max(1, round(fps / Config.ANALYSIS_FPS)) if fps > 0 else 1)
+            
+            # 🚀 One decoder thread per lane; the loop below only dequeues ready frames
+            producers = [FrameProducer(cap, skip).start() for cap, skip in zip(caps, sample_every)]
             
             self.update_status("Processing videos with real-time detection...")
             
             frame_count = 0
             lane_vehicle_counts = [[] for _ in range(4)]
             
-            # Create thread pool for parallel processing
-            with ThreadPoolExecutor(max_workers=4) as executor:
+            # Small pool for the OpenCV drawing only (cv2 releases the GIL); detection is one batched call
+            with ThreadPoolExecutor(max_workers=2) as executor:
                 while self.is_processing:
                     frames = []
                     all_ended = True
                     
-                    # Read frames from all videos
-                    for cap in caps:
-                        ret, frame = cap.read()
+                    # Read frames from all videos (producers grab() past the frames that are not analyzed)
+                    for producer in producers:
+                        ret, frame = producer.read()
                         if ret:
                             all_ended = False
                             frames.append(frame)
@@ -311,12 +350,13 @@ class TrafficManagementGUI:
                     if all_ended:
                         break
                     
-                    # Process frames in parallel
+                    # 🚀 BATCHED: one forward pass for all lanes, then annotate lanes in parallel
+                    valid = [(i, frame) for i, frame in enumerate(frames) if frame is not None]
+                    batch_detections = self.detector.detect_vehicles_batch([frame for _, frame in valid])
                     futures = []
-                    for i, frame in enumerate(frames):
-                        if frame is not None:
-                            future = executor.submit(self.process_single_frame, frame, i)
-                            futures.append((i, future))
+                    for (i, frame), detections in zip(valid, batch_detections):
+                        future = executor.submit(self.process_single_frame, frame, i, detections)
+                        futures.append((i, future))
                     
                     # Collect results
                     for i, future in futures:
@@ -329,9 +369,9 @@ class TrafficManagementGUI:
                     if frame_count % 30 == 0:
                         self.update_status(f"Processed {frame_count} frames...")
             
-            # Release captures
-            for cap in caps:
-                cap.release()
+            # Stop decoders (releases captures)
+            for producer in producers:
+                producer.stop()
             
             # Analyze results
             self.analyze_results(lane_vehicle_counts)
@@ -347,46 +387,22 @@ class TrafficManagementGUI:
             self.start_btn.config(state='normal')
             self.stop_btn.config(state='disabled')
     
-    def process_single_frame(self, frame, lane_id):
-        """Process a single frame with detection (for parallel execution)"""
+    def process_single_frame(self, frame, lane_id, detections=None):
+        """Annotate a single frame (for parallel execution), detecting first if no detections are given"""
         # Detect vehicles
-        detections = self.detector.detect_vehicles(frame)
-        
-        # Draw detections
-        annotated = self.detector.draw_detections(frame, detections)
-        
-        # Add lane info
-        cv2.putText(
-            annotated,
-            f"{Config.LANE_NAMES[lane_id]} Lane",
-            (10, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            1,
-            (0, 255, 0),
-            2
-        )
+        if detections is None:
+            detections = self.detector.detect_vehicles(frame)
         
-        cv2.putText(
-            annotated,
-            f"Vehicles: {len(detections)}",
-            (10, 70),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.8,
-            (255, 255, 0),
-            2
-        )
+        # Draw detections (in place: each decoded frame is used once)
+        annotated = self.detector.draw_detections(frame, detections, out=frame)
+        
+        # Add lane info + counter labels (pre-rendered)
+        self._lane_stamps[lane_id].draw(annotated)
+        
+        cv2.putText(annotated, str(len(detections)), *self._count_text)
         
         # Add FPS counter
-        if hasattr(self.detector, 'fps'):
-            cv2.putText(
-                annotated,
-                f"FPS: {self.detector.fps:.1f}",
-                (10, 110),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 255, 255),
-                2
-            )
+        cv2.putText(annotated, f"{self.detector.fps:.1f}", *self._fps_text)
         
         return annotated, len(detections)
     
@@ -397,19 +413,30 @@ class TrafficManagementGUI:
         display_width = 350
         display_height = int(height * (display_width / width))
         
-        frame_resized = cv2.resize(frame, (display_width, display_height))
+        # 🎯 MEMORY OPTIMIZATION: reuse this lane's buffers and PhotoImage instead of allocating per frame
+        rgb = self._rgb_bufs[lane_id]
+        if rgb is None or rgb.shape[:2] != (display_height, display_width):
+            self._small_bufs[lane_id] = np.empty((display_height, display_width, 3), dtype=np.uint8)
+            header = f"P6\n{display_width} {display_height}\n255\n".encode()
+            ppm = self._ppm_bufs[lane_id] = bytearray(len(header) + display_width * display_height * 3)
+            ppm[:len(header)] = header
+            rgb = self._rgb_bufs[lane_id] = np.frombuffer(ppm, dtype=np.uint8, offset=len(header)).reshape(
+                display_height, display_width, 3)
+            self._photos[lane_id] = tk.PhotoImage(width=display_width, height=display_height)
+            
+            # Bind the label to the persistent image once
+            if self.current_frame_labels[lane_id]:
+                self.current_frame_labels[lane_id].imgtk = self._photos[lane_id]
+                self.current_frame_labels[lane_id].configure(image=self._photos[lane_id])
         
-        # Convert BGR to RGB
-        frame_rgb = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB)
+        small = self._small_bufs[lane_id]
+        cv2.resize(frame, (display_width, display_height), dst=small)
         
-        # Convert to PhotoImage
-        img = Image.fromarray(frame_rgb)
-        imgtk = ImageTk.PhotoImage(image=img)
+        # Convert BGR to RGB, written directly into the PPM pixel area
+        cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb)
         
-            # Update label
-        if self.current_frame_labels[lane_id]:
-            self.current_frame_labels[lane_id].imgtk = imgtk
-            self.current_frame_labels[lane_id].configure(image=imgtk)
+        # ⚡ Hand Tk the PPM bytes directly (no PIL image / ImageTk bridge per frame)
+        self._photos[lane_id].configure(data=bytes(self._ppm_bufs[lane_id]), format='PPM')
         
         # Update FPS display
         if hasattr(self.detector, 'fps'):
@@ -461,17 +488,12 @@ class TrafficManagementGUI:
                 color = '#ff0000'
             
             self.signal_labels[i].config(fg=color)
-            
-            # Update countdown timer
-            remaining = info.get('time_remaining', 0)
-            if remaining > 0:
-                self.countdown_labels[i].config(text=f"{int(remaining)}s")
-            else:
-                self.countdown_labels[i].config(text="--")
         
-        # Schedule next update
-        if self.is_processing:
-            self.root.after(500, lambda: self.update_countdown_timers())
+        # Countdown labels are refreshed by the single update_countdown_timers() tick
+        self._signal_state = signal_status
+        if not self._countdown_scheduled:
+            self._countdown_scheduled = True
+            self.update_countdown_timers()
     
     def update_statistics(self, analysis):
         """Update statistics display"""
@@ -507,22 +529,23 @@ class TrafficManagementGUI:
         self.stats_text.insert(1.0, text)
     
     def update_countdown_timers(self):
-        """Continuously update countdown timers"""
-        if not self.is_processing:
-            return
-        
-        signal_status = self.controller.get_signal_status()
-        signals = signal_status.get('signals', {})
-        
-        for i, (lane_name, info) in enumerate(signals.items()):
-            remaining = info.get('time_remaining', 0)
-            if remaining > 0:
-                self.countdown_labels[i].config(text=f"{int(remaining)}s")
-            else:
-                self.countdown_labels[i].config(text="--")
-        
-        # Schedule next update
-        self.root.after(500, self.update_countdown_timers)
+        """Continuously update countdown timers from the latest polled signal status"""
+        signal_status = self._signal_state
+        if signal_status is not None:
+            signals = signal_status.get('signals', {})
+            
+            for i, (lane_name, info) in enumerate(signals.items()):
+                remaining = info.get('time_remaining', 0)
+                if remaining > 0:
+                    self.countdown_labels[i].config(text=f"{int(remaining)}s")
+                else:
+                    self.countdown_labels[i].config(text="--")
+        
+        # Schedule next update (one chain at most)
+        if self.is_processing:
+            self.root.after(500, self.update_countdown_timers)
+        else:
+            self._countdown_scheduled = False
     
     def update_status(self, message):
         """Update status bar"""
@@ -532,6 +555,9 @@ class TrafficManagementGUI:
 
 def main():
     """Launch the GUI application"""
+    # Lanes are already parallel (decoder threads + drawing pool); OpenCV's own pool would oversubscribe the cores
+    cv2.setNumThreads(1)
+    
     root = tk.Tk()
     app = TrafficManagementGUI(root)
     root.mainloop()
@@ -0,0 +1,253 @@
+"""
+Per-lane background capture + detection for the MJPEG video feed and live loop
+Decouples client streaming FPS from model FPS (keep-only-latest frame)
+"""
+import threading
+import time
+
+import cv2
+from loguru import logger
+
+from config import Config
+from video_io import open_capture, get_video_info
+
+
+class LaneStream:
+    """Background producer that decodes, detects and annotates one lane video
+
+    Clients never block on decode or detection: they read the most recent
+    annotated frame with latest() and pace themselves.
+    """
+
+    def __init__(self, lane_id: int, video_path, get_detector, detect_every: int = 5, idle_timeout: float = 30.0,
+                 encoder=None):
+        """
+        Args:
+            lane_id: Lane index (0-3)
+            video_path: Lane video file, looped forever
+            get_detector: Zero-arg callable returning the shared VehicleDetector, or None
+                while it is still loading; resolved on every detection so a stream
+                opened before model init picks the detector up once it is ready
+            detect_every: Run detection on every Nth frame
+            idle_timeout: Stop the producer after this many seconds without readers
+            encoder: Optional frame -> JPEG bytes callable; when set, each frame is
+                encoded once here and shared by every client via latest_part()
+        """
+        self.lane_id = lane_id
+        self.lane_name = Config.LANE_NAMES[lane_id]
+        self.video_path = video_path
+        self.get_detector = get_detector
+        self.detect_every = detect_every
+        self.idle_timeout = idle_timeout
+        self.encoder = encoder
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._frame = None
+        self._part = None
+        self._seq = 0
+        self._last_read = time.monotonic()
+
+    def start(self):
+        """Start the producer thread if it is not already running"""
+        with self._lock:
+            self._last_read = time.monotonic()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name=f"lane-stream-{self.lane_id}")
+            self._thread.start()
+
+    def latest(self):
+        """Most recent annotated frame and its sequence number (frame is None until the first one)"""
+        with self._lock:
+            self._last_read = time.monotonic()
+            return self._frame, self._seq
+
+    def latest_part(self):
+        """Most recent frame as a ready-to-send multipart/x-mixed-replace chunk and its sequence number"""
+        with self._lock:
+            self._last_read = time.monotonic()
+            return self._part, self._seq
+
+    def _run(self):
+        """Producer loop: read -> (every Nth frame) detect -> draw -> publish"""
+        cap = open_capture(self.video_path)
+        fps = get_video_info(cap)[0] or 30
+        frame_interval = 1.0 / fps
+        frame_count = 0
+        vehicle_count = 0
+        boxes_to_draw = []  # (top_left, bottom_right, label_org, label) per detection
+        logger.info(f"🎬 Lane stream {self.lane_id} started")
+
+        try:
+            next_frame_time = time.monotonic()
+            while time.monotonic() - self._last_read < self.idle_timeout:
+                ret, frame = cap.read()
+                if not ret:
+                    # Loop video
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    frame_count = 0
+                    continue
+
+                frame_count += 1
+
+                # 🎯 MEMORY OPTIMIZATION: Downscale once at read time so detect/draw/encode all work on 640px
+                height, width = frame.shape[:2]
+                if width > 640:
+                    frame = cv2.resize(frame, (640, int(height * 640 / width)), interpolation=cv2.INTER_AREA)
+
+                # Detect every Nth frame; boxes are reused in between
+                detector = self.get_detector() if frame_count % self.detect_every == 0 else None
+                if detector is not None:
+                    try:
+                        detections = detector.detect_vehicles(frame, lane_id=self.lane_name)
+                    except Exception as e:
+                        logger.error(f"Detection error in video feed: {e}")
+                        detections = []
+
+                    vehicle_count = len(detections)
+                    boxes_to_draw = [
+                        ((x1, y1), (x2, y2), (x1, y1 - 10), f"Vehicle {det['confidence']:.2f}")
+                        for det in detections
+                        for x1, y1, x2, y2 in (det['bbox'],)
+                    ]
+
+                # Draw bounding boxes from last detection
+                color = (0, 255, 0)  # Green
+                for top_left, bottom_right, label_org, label in boxes_to_draw:
+                    cv2.rectangle(frame, top_left, bottom_right, color, 2)
+                    cv2.putText(frame, label, label_org, cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+                # Add lane info overlay
+                cv2.putText(frame, f'Lane {self.lane_id} - {vehicle_count} vehicles',
+                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+                # ⚡ Encode once per frame for all viewers instead of once per frame per client
+                part = None
+                if self.encoder is not None:
+                    jpeg = self.encoder(frame)
+                    if jpeg is not None:
+                        part = b''.join((b'--frame\r\nContent-Type: image/jpeg\r\n\r\n', jpeg, b'\r\n'))
+
+                with self._lock:
+                    self._frame = frame
+                    self._part = part
+                    self._seq += 1
+
+                # Play at the video's native rate instead of decoding as fast as possible
+                next_frame_time += frame_interval
+                delay = next_frame_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_time = time.monotonic()
+        finally:
+            cap.release()
+            logger.info(f"Lane stream {self.lane_id} stopped (no viewers)")
+
+
+class LaneGrabber:
+    """Background decoder for one looping lane video (latest-frame mailbox)
+
+    Decode runs on its own thread at the video's native rate, so the live
+    detection loop never blocks on FFmpeg; it just takes the newest frame.
+    Clips that fit in cache_bytes are decoded once and replayed from memory,
+    avoiding the seek + re-decode stall at every loop.
+    """
+
+    def __init__(self, cap, lane_id: int, max_width: int = None, cache_bytes: int = 0):
+        """
+        Args:
+            cap: Opened capture (cv2.VideoCapture or video_io.AVCapture), owned by the grabber
+            lane_id: Lane index (0-3), used for the thread name
+            max_width: Downscale wider frames to this width (aspect preserved) on the decoder thread
+            cache_bytes: Keep the decoded clip in RAM and replay it if it fits in this many bytes (0 = never)
+        """
+        self.cap = cap
+        self.lane_id = lane_id
+        self.max_width = max_width
+        self.cache_bytes = cache_bytes
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"lane-grabber-{lane_id}")
+        self._frame = None
+        self._seq = 0
+
+    def start(self):
+        """Start decoding"""
+        self._thread.start()
+
+    def snapshot(self):
+        """Newest decoded frame and its sequence number (frame is None until the first decode)"""
+        with self._lock:
+            return self._frame, self._seq
+
+    def stop(self):
+        """Stop the decoder thread and release the capture"""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
+    def _run(self):
+        """Decoder loop: read (rewinding or replaying at EOF) -> publish -> pace to the video FPS"""
+        fps, width, height, _ = get_video_info(self.cap)
+        frame_interval = 1.0 / (fps or 30)
+
+        # Target size computed once from the stream metadata
+        target_size = None
+        if self.max_width and width > self.max_width:
+            target_size = (self.max_width, int(height * self.max_width / width))
+
+        cache = [] if self.cache_bytes > 0 else None  # First-pass frames, dropped once over budget
+        cached_bytes = 0
+        replay = None
+        replay_index = 0
+
+        try:
+            next_frame_time = time.monotonic()
+            while not self._stop.is_set():
+                if replay is not None:
+                    # ⚡ Decode-once replay: index arithmetic instead of seek + decode
+                    frame = replay[replay_index]
+                    replay_index = (replay_index + 1) % len(replay)
+                else:
+                    ret, frame = self.cap.read()
+                    if not ret:
+                        if cache:
+                            # Whole clip fits in the budget: serve it from memory from now on
+                            replay, cache = cache, None
+                            self.cap.release()
+                            logger.info(f"Lane {self.lane_id}: replaying {len(replay)} cached frames "
+                                        f"({cached_bytes / 1e6:.0f} MB)")
+                            continue
+
+                        # Loop video
+                        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        ret, frame = self.cap.read()
+                        if not ret:
+                            break
+
+                    # 🎯 Shrink once here so the detector uploads/letterboxes fewer bytes
+                    if target_size is not None and frame.shape[1] > self.max_width:
+                        frame = cv2.resize(frame, target_size, interpolation=cv2.INTER_AREA)
+
+                    if cache is not None:
+                        cached_bytes += frame.nbytes
+                        if cached_bytes > self.cache_bytes:
+                            cache = None  # Clip too long to hold; keep streaming from the decoder
+                        else:
+                            cache.append(frame)
+
+                with self._lock:
+                    self._frame = frame
+                    self._seq += 1
+
+                next_frame_time += frame_interval
+                delay = next_frame_time - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_frame_time = time.monotonic()
+        finally:
+            self.cap.release()
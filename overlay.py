@@ -0,0 +1,81 @@
+"""
+Pre-rendered constant overlays (lane banners, labels) for annotated frames
+"""
+import cv2
+import numpy as np
+
+
+def text_after(prefix, org, font_scale, color, thickness):
+    """putText arguments for a dynamic suffix continuing a pre-rendered prefix
+
+    The prefix is measured once with getTextSize, so per frame only the changing
+    part (e.g. a count) is rasterized: cv2.putText(frame, str(value), *args).
+
+    Args:
+        prefix: Static text already baked into an OverlayStamp at org
+        org: Baseline origin of the prefix
+        font_scale, color, thickness: Same style as the prefix
+
+    Returns:
+        tuple: (org, font, font_scale, color, thickness) for the suffix
+    """
+    (width, _), _ = cv2.getTextSize(prefix, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+    # getTextSize pads the advance width by the stroke thickness
+    return (org[0] + width - thickness, org[1]), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness
+
+
+class OverlayStamp:
+    """Constant text (optionally on a filled box) rasterized once, then blitted per frame
+
+    Hershey text rasterization repeats identical work every frame for labels that
+    never change; draw() instead copies the pre-rendered pixels with one masked copy.
+    """
+
+    def __init__(self, texts, box=None, box_color=(0, 0, 0)):
+        """
+        Args:
+            texts: List of (text, org, font_scale, color, thickness) drawn with FONT_HERSHEY_SIMPLEX
+            box: Optional ((x1, y1), (x2, y2)) filled rectangle drawn under the text
+            box_color: BGR color of the box
+        """
+        self.texts = texts
+        self.box = box
+        self.box_color = box_color
+
+        # Canvas from the frame origin to the far corner of everything drawn
+        x_max, y_max = 1, 1
+        if box is not None:
+            x_max, y_max = max(box[0][0], box[1][0]) + 1, max(box[0][1], box[1][1]) + 1
+        for text, (x, y), font_scale, _, thickness in texts:
+            (w, _), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+            x_max = max(x_max, x + w + thickness)
+            y_max = max(y_max, y + baseline + thickness)
+
+        canvas = np.zeros((y_max, x_max, 3), dtype=np.uint8)
+        mask = np.zeros((y_max, x_max), dtype=np.uint8)
+        self._render(canvas, mask)
+
+        # Keep only the bounding box of the drawn pixels
+        ys, xs = np.nonzero(mask)
+        self.y0, self.y1 = int(ys.min()), int(ys.max()) + 1
+        self.x0, self.x1 = int(xs.min()), int(xs.max()) + 1
+        self.patch = canvas[self.y0:self.y1, self.x0:self.x1].copy()
+        self.mask = (mask[self.y0:self.y1, self.x0:self.x1] > 0)[:, :, None]
+
+    def _render(self, frame, mask=None):
+        """Rasterize the box and texts into frame (and into mask, when given)"""
+        if self.box is not None:
+            cv2.rectangle(frame, self.box[0], self.box[1], self.box_color, -1)
+            if mask is not None:
+                cv2.rectangle(mask, self.box[0], self.box[1], 255, -1)
+        for text, org, font_scale, color, thickness in self.texts:
+            cv2.putText(frame, text, org, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+            if mask is not None:
+                cv2.putText(mask, text, org, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 255, thickness)
+
+    def draw(self, frame):
+        """Stamp the overlay onto a BGR frame in place"""
+        if frame.shape[0] < self.y1 or frame.shape[1] < self.x1:
+            self._render(frame)  # Frame smaller than the stamp: clip via OpenCV
+            return
+        np.copyto(frame[self.y0:self.y1, self.x0:self.x1], self.patch, where=self.mask)
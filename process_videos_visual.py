@@ -2,7 +2,9 @@
 Process videos and create annotated outputs with bounding boxes
 Run this to see detected vehicles with boxes around them!
 """
+import multiprocessing
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import cv2
 from loguru import logger
@@ -13,105 +15,129 @@ logger.add(sys.stdout, level="INFO")
 
 from config import Config
 from vehicle_detector import VehicleDetector
+from video_io import open_capture, get_video_info, create_video_writer, FrameWriter
+from overlay import OverlayStamp, text_after
 
-def process_video_with_visualization(video_path, lane_id, output_path=None):
+def process_video_with_visualization(video_path, lane_id, detector, output_path=None):
     """
     Process video and create annotated version with bounding boxes
     
     Args:
         video_path: Path to input video
         lane_id: Lane identifier (0-3)
+        detector: Loaded VehicleDetector, shared across lanes
         output_path: Where to save annotated video
     """
     logger.info(f"🎬 Processing {Config.LANE_NAMES[lane_id]} lane: {video_path}")
     
-    # Initialize detector
-    detector = VehicleDetector()
-    
-    # Open video
-    cap = cv2.VideoCapture(str(video_path))
+    # Open video (hardware decode when available)
+    cap = open_capture(video_path)
     if not cap.isOpened():
         logger.error(f"Failed to open video: {video_path}")
         return None
     
     # Get video properties
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps, width, height, total_frames = get_video_info(cap)
     
     logger.info(f"📹 Video: {width}x{height} @ {fps} FPS, {total_frames} frames")
     
+    # ⚡ FPS SUBSAMPLING: retrieve/detect only ANALYSIS_FPS frames per second, grab() past the rest
+    sample_every = max(1, round(fps / Config.ANALYSIS_FPS)) if fps > 0 else 1
+    out_fps = fps / sample_every if fps > 0 else Config.ANALYSIS_FPS
+    
     # Setup output
     if output_path is None:
         output_path = Config.OUTPUT_DIR / f"{Config.LANE_NAMES[lane_id]}_annotated.mp4"
     
-    # Create video writer
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
-    
-    frame_idx = 0
+    # Create video writer (NVENC when available, mp4v otherwise)
+    # ⚡ Encoding runs on its own thread; the loop below only enqueues annotated frames
+    out = FrameWriter(create_video_writer(output_path, out_fps, (width, height))).start()
+    
+    # ⚡ Black info box + lane name rendered once; only the counters are drawn per frame
+    lane_banner = OverlayStamp(
+        [(f"Lane: {Config.LANE_NAMES[lane_id]}", (20, 40), 0.8, (0, 255, 0), 2),
+         ("Frame: ", (20, 70), 0.6, (255, 255, 255), 1),
+         ("Vehicles: ", (20, 95), 0.6, (255, 255, 0), 2)],
+        box=((10, 10), (400, 100))
+    )
+    frame_text = text_after("Frame: ", (20, 70), 0.6, (255, 255, 255), 1)
+    vehicles_text = text_after("Vehicles: ", (20, 95), 0.6, (255, 255, 0), 2)
+    
+    frame_idx = 0  # Source frame position
+    processed = 0
     total_vehicles = 0
     
     logger.info(f"🚗 Starting detection... This may take a few minutes...")
     logger.info(f"💾 Output will be saved to: {output_path}")
     
     while True:
+        # Skipped frames only advance the stream; no BGR conversion or detection
+        for _ in range(sample_every - 1):
+            if not cap.grab():
+                break
+            frame_idx += 1
+        
         ret, frame = cap.read()
         if not ret:
             break
         
-        # Detect vehicles in this frame
-        detections = detector.detect_vehicles(frame)
+        # Detect vehicles (model runs on every DETECTION_CACHE_FRAMES-th sampled frame, boxes reused between)
+        detections = detector.detect_vehicles_cached(frame, processed, Config.LANE_NAMES[lane_id])
         
-        # Draw bounding boxes
-        annotated_frame = detector.draw_detections(frame, detections)
+        # Draw bounding boxes (in place: the decoded frame is not needed afterwards)
+        annotated_frame = detector.draw_detections(frame, detections, out=frame)
         
         # Add lane info overlay
-        cv2.rectangle(annotated_frame, (10, 10), (400, 100), (0, 0, 0), -1)
-        cv2.putText(annotated_frame, f"Lane: {Config.LANE_NAMES[lane_id]}", 
-                   (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-        cv2.putText(annotated_frame, f"Frame: {frame_idx}/{total_frames}", 
-                   (20, 70), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-        cv2.putText(annotated_frame, f"Vehicles: {len(detections)}", 
-                   (20, 95), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+        lane_banner.draw(annotated_frame)
+        cv2.putText(annotated_frame, f"{frame_idx}/{total_frames}", *frame_text)
+        cv2.putText(annotated_frame, str(len(detections)), *vehicles_text)
         
-        # Write frame
+        # Write frame (queued; annotated_frame is a fresh decode buffer, never reused)
         out.write(annotated_frame)
         
         frame_idx += 1
+        processed += 1
         total_vehicles += len(detections)
         
         # Progress update
-        if frame_idx % 30 == 0:
+        if processed % 30 == 0:
             progress = (frame_idx / total_frames) * 100
             logger.info(f"⏳ Progress: {progress:.1f}% ({frame_idx}/{total_frames} frames)")
     
     cap.release()
     out.release()
     
-    logger.success(f"✅ Done! Processed {frame_idx} frames, detected {total_vehicles} vehicles")
+    logger.success(f"✅ Done! Processed {processed} of {frame_idx} frames, detected {total_vehicles} vehicles")
     logger.success(f"📁 Annotated video saved: {output_path}")
     
     return str(output_path)
 
 
+def init_worker(model_path):
+    """Process pool initializer: load one detector per worker process (model exported by the parent)"""
+    global detector
+    cv2.setNumThreads(1)  # Lanes already run in parallel processes
+    detector = VehicleDetector(model_path=model_path, export=False)
+
+
+def process_lane(job):
+    """Pool task: annotate one (lane_id, video_path) with this worker's detector"""
+    lane_id, video_path = job
+    return process_video_with_visualization(video_path, lane_id, detector)
+
+
 def main():
     """Process all 4 lane videos"""
     print("\n" + "="*80)
     print("🚦 TRAFFIC VIDEO PROCESSOR - WITH BOUNDING BOXES")
     print("="*80 + "\n")
     
-    # Find videos
-    video_files = [
-        Config.VIDEO_DIR / "lane_0.mp4",
-        Config.VIDEO_DIR / "lane_1.mp4",
-        Config.VIDEO_DIR / "lane_2.mp4",
-        Config.VIDEO_DIR / "lane_3.mp4"
-    ]
-    
-    # Check which videos exist
-    available_videos = [v for v in video_files if v.exists()]
+    # Find videos: one directory listing, lane id parsed once per file
+    lane_files = ((v.stem.split('_', 1)[1], v) for v in Config.VIDEO_DIR.glob('lane_*.mp4'))
+    available_videos = sorted(
+        (int(lane), v) for lane, v in lane_files
+        if lane.isdigit() and int(lane) < len(Config.LANE_NAMES)
+    )
     
     if not available_videos:
         logger.error("❌ No videos found in videos/ folder!")
@@ -121,16 +147,28 @@ def main():
     logger.info(f"📹 Found {len(available_videos)} videos to process")
     print()
     
-    # Process each video
+    workers = min(Config.VIDEO_WORKERS, len(available_videos))
     output_files = []
-    for idx, video_path in enumerate(available_videos):
-        lane_id = int(video_path.stem.split('_')[1])
+    if workers > 1:
+        # 🚀 PARALLEL: each worker process owns its detector and decode/encode pipeline (no shared GIL)
+        logger.info(f"🔧 Processing {workers} lanes at a time")
+        # Export TensorRT/OpenVINO once here; workers exporting concurrently would clobber each other's files
+        model_path = VehicleDetector.prepare_model()
+        # spawn: the export above may have initialized CUDA, which forked children cannot reuse
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_path,),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            output_files = [path for path in pool.map(process_lane, available_videos) if path]
+    else:
+        # ⚡ Load the model (and warm up the GPU) once for all lanes
+        detector = VehicleDetector()
         
-        print("\n" + "-"*80)
-        output_path = process_video_with_visualization(video_path, lane_id)
-        if output_path:
-            output_files.append(output_path)
-        print("-"*80)
+        # Process each video
+        for lane_id, video_path in available_videos:
+            print("\n" + "-"*80)
+            output_path = process_video_with_visualization(video_path, lane_id, detector)
+            if output_path:
+                output_files.append(output_path)
+            print("-"*80)
     
     # Summary
     print("\n" + "="*80)
@@ -0,0 +1,59 @@
+"""
+Fixed-size sliding window with O(1) running sum and max
+"""
+from collections import deque
+
+
+class RollingWindow:
+    """Sliding window over the last N values
+
+    Keeps a running total (updated on append/evict) and a monotonic deque for
+    the window max, so total/mean/max are O(1) instead of a pass over the window.
+    """
+
+    def __init__(self, maxlen: int):
+        """
+        Args:
+            maxlen: Number of most recent values to keep
+        """
+        self.maxlen = maxlen
+        self._values = deque()
+        self._max_candidates = deque()  # (index, value), values strictly decreasing
+        self._next_index = 0
+        self.total = 0
+
+    def append(self, value):
+        """Add a value, evicting the oldest one when the window is full"""
+        if len(self._values) == self.maxlen:
+            self.total -= self._values.popleft()
+        self._values.append(value)
+        self.total += value
+
+        index = self._next_index
+        self._next_index += 1
+        while self._max_candidates and self._max_candidates[-1][1] <= value:
+            self._max_candidates.pop()
+        self._max_candidates.append((index, value))
+        if self._max_candidates[0][0] <= index - self.maxlen:
+            self._max_candidates.popleft()
+
+    @property
+    def max(self):
+        """Largest value in the window (0 when empty)"""
+        return self._max_candidates[0][1] if self._max_candidates else 0
+
+    @property
+    def mean(self):
+        """Average of the window (0 when empty)"""
+        return self.total / len(self._values) if self._values else 0
+
+    @property
+    def last(self):
+        """Most recent value (0 when empty)"""
+        return self._values[-1] if self._values else 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
@@ -2,20 +2,25 @@
 Traffic Signal Controller
 Manages traffic light states and timing based on real-time analysis
 """
+import threading
 import time
+from collections import deque
+from itertools import islice
 from typing import Dict, List
-from enum import Enum
 from datetime import datetime, timedelta
 from loguru import logger
 from config import Config
 
 
-class SignalState(Enum):
-    """Traffic signal states"""
-    RED = "RED"
-    YELLOW = "YELLOW"
-    GREEN = "GREEN"
-    ALL_RED = "ALL_RED"
+# ⚡ SWAR signal word: lane k's 2-bit state code lives in bits 2k..2k+1 of one int (0 = all RED)
+RED, YELLOW, GREEN, ALL_RED = 0, 1, 2, 3
+_STATE_BITS = 2
+_STATE_MASK = 0b11
+_STATE_NAMES = ('RED', 'YELLOW', 'GREEN', 'ALL_RED')  # Code -> state name
+_STATE_ICONS = ('🔴', '🟡', '🟢', '🔴')  # Code -> visualization icon
+
+_VIZ_HEADER = "\n" + "="*50 + "\n        TRAFFIC SIGNAL STATUS\n" + "="*50
+_VIZ_FOOTER = "="*50 + "\n"
 
 
 class TrafficSignalController:
@@ -24,12 +29,35 @@ class TrafficSignalController:
     def __init__(self):
         """Initialize traffic signal controller"""
         self.num_lanes = 4
-        self.current_signals = {i: SignalState.RED for i in range(self.num_lanes)}
+        self._word = 0  # All lanes RED
+        
+        # ⚡ Config values bound once (tuple index / local attribute instead of Config lookups per call)
+        self._lane_names = tuple(
+            Config.LANE_NAMES[lane_id] if lane_id < len(Config.LANE_NAMES) else f'Lane {lane_id}'
+            for lane_id in range(self.num_lanes)
+        )
+        self._min_green_time = Config.MIN_GREEN_TIME
+        self._yellow_time = Config.YELLOW_TIME
         self.current_green_lane = None
-        self.signal_history = []
+        self.signal_history = deque(maxlen=Config.HISTORY_LIMIT)  # Bounded: oldest records evicted
         self.cycle_count = 0
         self.start_time = None
         self.phase_start_time = None
+        self._lane_green_counts = [0] * self.num_lanes  # Green phases per lane, kept incrementally
+        
+        # ⚡ Non-blocking yellow phase: the lane leaving green shows YELLOW until this
+        # deadline and is switched to RED lazily by _settle_yellow() (no sleep)
+        self._yellow_lane = None
+        self._yellow_until = 0.0
+        # Guards _word and the yellow state: getters settle the yellow phase from
+        # reader threads (GUI poller, Flask) while the analysis thread transitions
+        self._lock = threading.Lock()
+        
+        # Pre-formatted visualize_signals() line for every (lane, state code)
+        self._viz_lines = [
+            [f"  {self._lane_names[lane_id]:10s} [{icon}] {name:8s}" for name, icon in zip(_STATE_NAMES, _STATE_ICONS)]
+            for lane_id in range(self.num_lanes)
+        ]
         
         logger.info("Traffic Signal Controller initialized")
     
@@ -62,24 +90,25 @@ class TrafficSignalController:
         
         # Get recommended green time
         green_times = analysis_result.get('recommended_green_times', {})
-        current_green_time = green_times.get(highest_priority_lane, Config.MIN_GREEN_TIME)
+        current_green_time = green_times.get(highest_priority_lane, self._min_green_time)
         
-        # Record signal change
+        # Record signal change (epoch float; ISO string built only in get_signal_history)
         signal_record = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': time.time(),
             'cycle': self.cycle_count,
             'green_lane': highest_priority_lane,
-            'green_lane_name': Config.LANE_NAMES[highest_priority_lane],
+            'green_lane_name': self._lane_names[highest_priority_lane],
             'green_duration': current_green_time,
             'priority_score': priorities[0]['priority_score'],
             'congestion_level': priorities[0]['congestion_level'],
-            'signals': dict(self.current_signals)
+            'signals': self._word  # Immutable int snapshot, decoded in get_signal_history
         }
         
         self.signal_history.append(signal_record)
         self.cycle_count += 1
+        self._lane_green_counts[highest_priority_lane] += 1
         
-        logger.info(f"Signals updated: {Config.LANE_NAMES[highest_priority_lane]} -> GREEN "
+        logger.info(f"Signals updated: {self._lane_names[highest_priority_lane]} -> GREEN "
                    f"for {current_green_time}s")
         
         return self._get_signal_status()
@@ -92,63 +121,76 @@ class TrafficSignalController:
             target_lane: Lane ID to give green signal
             signal_assignment: Signal assignments for all lanes
         """
-        # If there's currently a green lane, transition it properly
-        if self.current_green_lane is not None and self.current_green_lane != target_lane:
-            # Current green -> Yellow
-            self.current_signals[self.current_green_lane] = SignalState.YELLOW
-            logger.debug(f"Lane {self.current_green_lane} -> YELLOW")
+        with self._lock:
+            # A pending yellow keeps its deadline unless a new green -> yellow replaces it
+            yellow_lane = self._yellow_lane
+            if yellow_lane == target_lane:
+                yellow_lane = None  # Yellow lane goes straight back to green
             
-            # Simulate yellow time
-            time.sleep(0.1)  # Symbolic delay
+            # If there's currently a green lane, transition it properly
+            if self.current_green_lane is not None and self.current_green_lane != target_lane:
+                # Current green -> Yellow; Yellow -> Red happens YELLOW_TIME later in _settle_yellow()
+                yellow_lane = self.current_green_lane
+                self._yellow_until = time.monotonic() + self._yellow_time
+                logger.debug(f"Lane {self.current_green_lane} -> YELLOW")
             
-            # Yellow -> Red
-            self.current_signals[self.current_green_lane] = SignalState.RED
-            logger.debug(f"Lane {self.current_green_lane} -> RED")
+            # All lanes red, except the yellow one and the target lane (green): built in one word
+            word = GREEN << (_STATE_BITS * target_lane)
+            if yellow_lane is not None:
+                word |= YELLOW << (_STATE_BITS * yellow_lane)
+            self._word = word
+            self._yellow_lane = yellow_lane
+            self.current_green_lane = target_lane
             
-            # All red phase (safety clearance)
-            all_red_start = time.time()
-            logger.debug("All RED phase for safety clearance")
-        
-        # Set target lane to green
-        self.current_signals[target_lane] = SignalState.GREEN
-        self.current_green_lane = target_lane
-        
-        # Ensure all other lanes are red
-        for lane_id in range(self.num_lanes):
-            if lane_id != target_lane:
-                self.current_signals[lane_id] = SignalState.RED
-        
-        self.phase_start_time = datetime.now()
+            self.phase_start_time = time.monotonic()
+    
+    def _settle_yellow(self):
+        """Turn the yellow lane RED once its yellow time has elapsed"""
+        with self._lock:
+            yellow_lane = self._yellow_lane
+            if yellow_lane is not None and time.monotonic() >= self._yellow_until:
+                self._word &= ~(_STATE_MASK << (_STATE_BITS * yellow_lane))  # RED = 0
+                self._yellow_lane = None
+                logger.debug(f"Lane {yellow_lane} -> RED")
+    
+    def _states(self, word: int = None) -> List[int]:
+        """Decode a signal word (default: the current one) into per-lane state codes"""
+        if word is None:
+            word = self._word
+        return [(word >> (_STATE_BITS * lane_id)) & _STATE_MASK for lane_id in range(self.num_lanes)]
     
     def _get_signal_status(self) -> Dict:
         """Get current signal status for all lanes with countdown"""
+        self._settle_yellow()
+        
+        # ⚡ One clock read per call, shared by every lane's countdown
+        elapsed = time.monotonic() - self.phase_start_time if self.phase_start_time else None
         status = {
             'timestamp': datetime.now().isoformat(),
             'cycle': self.cycle_count,
             'signals': {}
         }
         
+        states = self._states()
         for lane_id in range(self.num_lanes):
-            lane_name = Config.LANE_NAMES[lane_id] if lane_id < len(Config.LANE_NAMES) else f'Lane {lane_id}'
+            lane_name = self._lane_names[lane_id]
             
             # Calculate time remaining for green signal
             time_remaining = 0
-            if lane_id == self.current_green_lane and self.phase_start_time:
-                elapsed = (datetime.now() - self.phase_start_time).total_seconds()
-                time_remaining = max(0, Config.MIN_GREEN_TIME - elapsed)
+            if lane_id == self.current_green_lane and elapsed is not None:
+                time_remaining = max(0, self._min_green_time - elapsed)
             
             status['signals'][lane_name] = {
                 'lane_id': lane_id,
-                'state': self.current_signals[lane_id].value,
-                'is_green': self.current_signals[lane_id] == SignalState.GREEN,
+                'state': _STATE_NAMES[states[lane_id]],
+                'is_green': states[lane_id] == GREEN,
                 'time_remaining': time_remaining
             }
         
         if self.current_green_lane is not None:
-            status['current_green_lane'] = Config.LANE_NAMES[self.current_green_lane]
+            status['current_green_lane'] = self._lane_names[self.current_green_lane]
             
-            if self.phase_start_time:
-                elapsed = (datetime.now() - self.phase_start_time).total_seconds()
+            if elapsed is not None:
                 status['phase_elapsed_time'] = round(elapsed, 1)
         
         return status
@@ -167,57 +209,59 @@ class TrafficSignalController:
         Returns:
             List of signal change records
         """
-        return self.signal_history[-limit:]
+        return [
+            {
+                **record,
+                'timestamp': datetime.fromtimestamp(record['timestamp']).isoformat(),
+                'signals': {lane_id: _STATE_NAMES[code] for lane_id, code in enumerate(self._states(record['signals']))}
+            }
+            for record in islice(self.signal_history, max(0, len(self.signal_history) - limit), None)
+        ]
     
     def get_statistics(self) -> Dict:
-        """Get controller statistics"""
-        if not self.signal_history:
+        """Get controller statistics (O(1): counters are maintained by update_signals)"""
+        if not self.cycle_count:
             return {
                 'total_cycles': 0,
                 'lanes_served': {},
                 'average_cycle_time': 0
             }
         
-        # Count how many times each lane got green
-        lane_green_counts = {i: 0 for i in range(self.num_lanes)}
-        for record in self.signal_history:
-            lane_id = record.get('green_lane')
-            if lane_id is not None:
-                lane_green_counts[lane_id] += 1
-        
         # Convert to lane names
-        lanes_served = {
-            Config.LANE_NAMES[lane_id]: count 
-            for lane_id, count in lane_green_counts.items()
-        }
+        lanes_served = dict(zip(self._lane_names, self._lane_green_counts))
         
         return {
             'total_cycles': self.cycle_count,
             'lanes_served': lanes_served,
-            'total_signal_changes': len(self.signal_history)
+            'total_signal_changes': self.cycle_count  # One history record per cycle
         }
     
     def reset(self):
         """Reset controller to initial state"""
-        self.current_signals = {i: SignalState.RED for i in range(self.num_lanes)}
-        self.current_green_lane = None
-        self.signal_history = []
+        with self._lock:
+            self._word = 0  # All lanes RED
+            self._yellow_lane = None
+            self.current_green_lane = None
+        self.signal_history = deque(maxlen=Config.HISTORY_LIMIT)  # Bounded: oldest records evicted
         self.cycle_count = 0
         self.start_time = None
         self.phase_start_time = None
+        self._lane_green_counts = [0] * self.num_lanes
         logger.info("Traffic Signal Controller reset")
     
     def emergency_all_red(self):
         """Set all signals to RED (emergency situation)"""
-        for lane_id in range(self.num_lanes):
-            self.current_signals[lane_id] = SignalState.RED
-        self.current_green_lane = None
+        with self._lock:
+            self._word = 0
+            self.current_green_lane = None
+            self._yellow_lane = None
         logger.warning("EMERGENCY: All signals set to RED")
     
     def get_lane_signal(self, lane_id: int) -> str:
         """Get current signal state for a specific lane"""
         if 0 <= lane_id < self.num_lanes:
-            return self.current_signals[lane_id].value
+            self._settle_yellow()
+            return _STATE_NAMES[(self._word >> (_STATE_BITS * lane_id)) & _STATE_MASK]
         return "UNKNOWN"
     
     def visualize_signals(self) -> str:
@@ -227,30 +271,20 @@ class TrafficSignalController:
         Returns:
             String representation of signals
         """
-        signal_icons = {
-            'RED': '🔴',
-            'YELLOW': '🟡',
-            'GREEN': '🟢',
-            'ALL_RED': '🔴'
-        }
-        
-        lines = ["\n" + "="*50]
-        lines.append("        TRAFFIC SIGNAL STATUS")
-        lines.append("="*50)
+        self._settle_yellow()
         
+        # ⚡ Static text (header, lane/state lines) is pre-formatted; only the elapsed time is built per call
+        lines = [_VIZ_HEADER]
+        states = self._states()
         for lane_id in range(self.num_lanes):
-            lane_name = Config.LANE_NAMES[lane_id]
-            signal = self.current_signals[lane_id].value
-            icon = signal_icons.get(signal, '⚪')
-            
-            status_line = f"  {lane_name:10s} [{icon}] {signal:8s}"
+            status_line = self._viz_lines[lane_id][states[lane_id]]
             
             if self.current_green_lane == lane_id and self.phase_start_time:
-                elapsed = (datetime.now() - self.phase_start_time).total_seconds()
+                elapsed = time.monotonic() - self.phase_start_time
                 status_line += f"  ({elapsed:.1f}s elapsed)"
             
             lines.append(status_line)
         
-        lines.append("="*50 + "\n")
+        lines.append(_VIZ_FOOTER)
         
         return "\n".join(lines)
@@ -3,9 +3,14 @@ Traffic Analyzer Module
 Analyzes traffic density and determines optimal signal timing
 """
 import numpy as np
+from collections import Counter, deque
 from typing import List, Dict, Tuple
 from loguru import logger
 from config import Config
+from _kernels import score_lanes
+
+# Level names indexed by the level ids returned by score_lanes()
+_CONGESTION_LEVELS = ('VERY_LOW', 'LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
 
 
 class TrafficAnalyzer:
@@ -14,7 +19,22 @@ class TrafficAnalyzer:
     def __init__(self):
         """Initialize traffic analyzer"""
         self.lane_data = {}
-        self.history = []
+        self.history = deque(maxlen=Config.HISTORY_LIMIT)  # Bounded: oldest analyses evicted
+        
+        # Green times computed alongside the last priority list (same kernel pass)
+        self._last_green_times = (None, None)
+        
+        # Congestion thresholds in ascending order, read from Config once: level id = thresholds reached
+        self._level_thresholds = np.array(
+            [Config.LOW_CONGESTION, Config.MEDIUM_CONGESTION, Config.HIGH_CONGESTION, Config.CRITICAL_CONGESTION],
+            dtype=np.float64
+        )
+        
+        # ⚡ Signal timing bound once instead of Config lookups per lane
+        self._min_green_time = Config.MIN_GREEN_TIME
+        self._max_green_time = Config.MAX_GREEN_TIME
+        self._yellow_time = Config.YELLOW_TIME
+        self._all_red_time = Config.ALL_RED_TIME
         
     def analyze_all_lanes(self, lane_results: List[Dict]) -> Dict:
         """
@@ -54,7 +74,7 @@ class TrafficAnalyzer:
             'priority_ranking': priority_scores,
             'signal_assignment': signal_assignment,
             'recommended_green_times': green_times,
-            'congestion_summary': self._generate_congestion_summary(lane_results),
+            'congestion_summary': self._generate_congestion_summary(priority_scores),
             'recommendations': self._generate_recommendations(lane_results, priority_scores)
         }
         
@@ -75,46 +95,46 @@ class TrafficAnalyzer:
         Returns:
             Sorted list of lanes by priority
         """
-        priorities = []
+        # ⚡ VECTORIZED: one NumPy column per factor (structure-of-arrays) instead of per-lane scalar math
+        n = len(lane_results)
+        congestion = np.fromiter((r.get('congestion_score', 0) for r in lane_results), dtype=np.float64, count=n)
+        totals = np.fromiter((r.get('total_vehicles', 0) for r in lane_results), dtype=np.float64, count=n)
+        max_vehicles = np.fromiter((r.get('max_vehicles_in_frame', 0) for r in lane_results), dtype=np.float64, count=n)
+        avg_vehicles = np.fromiter((r.get('avg_vehicles_per_frame', 0) for r in lane_results), dtype=np.float64, count=n)
+        
+        # Heavy vehicle count (buses and trucks get more weight)
+        heavy = [
+            counts.get('bus', 0) + counts.get('truck', 0)
+            for counts in (r.get('vehicle_counts', {}) for r in lane_results)
+        ]
+        
+        # 🚀 JIT KERNEL: composite score, congestion level and green time for all lanes in one pass
+        scores, green_times, level_ids = score_lanes(
+            congestion, totals, max_vehicles, np.asarray(heavy, dtype=np.float64), avg_vehicles,
+            self._level_thresholds, self._min_green_time, self._max_green_time
+        )
         
-        for result in lane_results:
-            # Multiple factors for priority calculation
+        # Sort by priority score (highest first, ties keep input order), then build the report dicts
+        priorities = []
+        for rank, idx in enumerate(np.argsort(-scores, kind='stable').tolist(), 1):
+            result = lane_results[idx]
             congestion_score = result.get('congestion_score', 0)
-            total_vehicles = result.get('total_vehicles', 0)
-            max_vehicles = result.get('max_vehicles_in_frame', 0)
-            avg_vehicles = result.get('avg_vehicles_per_frame', 0)
-            
-            # Heavy vehicle count (buses and trucks get more weight)
-            vehicle_counts = result.get('vehicle_counts', {})
-            heavy_vehicles = vehicle_counts.get('bus', 0) + vehicle_counts.get('truck', 0)
-            
-            # Calculate composite priority score
-            # 50% congestion, 20% total vehicles, 15% max vehicles, 10% heavy vehicles, 5% average
-            priority_score = (
-                congestion_score * 0.50 +
-                min(total_vehicles / 10, 20) * 0.20 +
-                max_vehicles * 2 * 0.15 +
-                heavy_vehicles * 1.5 * 0.10 +
-                avg_vehicles * 5 * 0.05
-            )
-            
             priorities.append({
                 'lane_id': result['lane_id'],
                 'lane_name': result['lane_name'],
-                'priority_score': round(priority_score, 2),
+                'priority_score': float(scores[idx]),
                 'congestion_score': congestion_score,
-                'total_vehicles': total_vehicles,
-                'max_vehicles_in_frame': max_vehicles,
-                'heavy_vehicles': heavy_vehicles,
-                'congestion_level': self._get_congestion_level(congestion_score)
+                'total_vehicles': result.get('total_vehicles', 0),
+                'max_vehicles_in_frame': result.get('max_vehicles_in_frame', 0),
+                'heavy_vehicles': heavy[idx],
+                'congestion_level': _CONGESTION_LEVELS[level_ids[idx]],
+                'rank': rank
             })
         
-        # Sort by priority score (highest first)
-        priorities.sort(key=lambda x: x['priority_score'], reverse=True)
-        
-        # Add rank
-        for idx, priority in enumerate(priorities):
-            priority['rank'] = idx + 1
+        # _calculate_green_times(priorities) reuses the kernel's green times instead of recomputing
+        self._last_green_times = (priorities, {
+            lane_results[i]['lane_id']: int(green_times[i]) for i in range(n)
+        })
         
         return priorities
     
@@ -156,6 +176,10 @@ class TrafficAnalyzer:
         Returns:
             Dictionary mapping lane_id to recommended green time (seconds)
         """
+        cached_priorities, cached_green_times = self._last_green_times
+        if priorities is cached_priorities:
+            return dict(cached_green_times)
+        
         green_times = {}
         
         for priority in priorities:
@@ -165,60 +189,55 @@ class TrafficAnalyzer:
             # Scale green time based on priority score
             # Higher score = longer green time
             if score >= 50:
-                green_time = Config.MAX_GREEN_TIME
+                green_time = self._max_green_time
             elif score >= 30:
-                green_time = int(Config.MAX_GREEN_TIME * 0.75)
+                green_time = int(self._max_green_time * 0.75)
             elif score >= 15:
-                green_time = int(Config.MAX_GREEN_TIME * 0.50)
+                green_time = int(self._max_green_time * 0.50)
             else:
-                green_time = Config.MIN_GREEN_TIME
+                green_time = self._min_green_time
             
             green_times[lane_id] = green_time
         
         return green_times
     
     def _generate_lane_statistics(self, lane_results: List[Dict]) -> Dict:
-        """Generate comprehensive statistics for all lanes"""
-        total_vehicles_all_lanes = sum(r.get('total_vehicles', 0) for r in lane_results)
-        avg_congestion = np.mean([r.get('congestion_score', 0) for r in lane_results])
+        """Generate comprehensive statistics for all lanes (single pass over the lanes)"""
+        total_vehicles_all_lanes = 0
+        congestion_sum = 0.0
+        most_congested = least_congested = lane_results[0]
+        max_congestion = min_congestion = lane_results[0].get('congestion_score', 0)
         
         # Vehicle type distribution across all lanes
-        all_vehicle_counts = {}
+        all_vehicle_counts = Counter()
+        
         for result in lane_results:
-            for vtype, count in result.get('vehicle_counts', {}).items():
-                all_vehicle_counts[vtype] = all_vehicle_counts.get(vtype, 0) + count
+            congestion = result.get('congestion_score', 0)
+            total_vehicles_all_lanes += result.get('total_vehicles', 0)
+            congestion_sum += congestion
+            all_vehicle_counts.update(result.get('vehicle_counts', {}))
+            
+            # Strict comparisons keep the first lane on ties, like max()/min()
+            if congestion > max_congestion:
+                most_congested, max_congestion = result, congestion
+            if congestion < min_congestion:
+                least_congested, min_congestion = result, congestion
         
         return {
             'total_vehicles_all_lanes': total_vehicles_all_lanes,
-            'average_congestion_score': round(avg_congestion, 2),
-            'vehicle_type_distribution': all_vehicle_counts,
-            'most_congested_lane': max(lane_results, key=lambda x: x.get('congestion_score', 0))['lane_name'],
-            'least_congested_lane': min(lane_results, key=lambda x: x.get('congestion_score', 0))['lane_name']
+            'average_congestion_score': round(congestion_sum / len(lane_results), 2),
+            'vehicle_type_distribution': dict(all_vehicle_counts),
+            'most_congested_lane': most_congested['lane_name'],
+            'least_congested_lane': least_congested['lane_name']
         }
     
-    def _generate_congestion_summary(self, lane_results: List[Dict]) -> Dict:
-        """Generate congestion level summary"""
-        levels = {'VERY_LOW': 0, 'LOW': 0, 'MEDIUM': 0, 'HIGH': 0, 'CRITICAL': 0}
-        
-        for result in lane_results:
-            level = self._get_congestion_level(result.get('congestion_score', 0))
-            levels[level] += 1
-        
+    def _generate_congestion_summary(self, priorities: List[Dict]) -> Dict:
+        """Generate congestion level summary (tallies the levels already set by _calculate_priorities)"""
+        levels = dict.fromkeys(_CONGESTION_LEVELS, 0)
+        for priority in priorities:
+            levels[priority['congestion_level']] += 1
         return levels
     
-    def _get_congestion_level(self, score: float) -> str:
-        """Convert congestion score to level with realistic thresholds"""
-        if score >= Config.CRITICAL_CONGESTION:
-            return 'CRITICAL'
-        elif score >= Config.HIGH_CONGESTION:
-            return 'HIGH'
-        elif score >= Config.MEDIUM_CONGESTION:
-            return 'MEDIUM'
-        elif score >= Config.LOW_CONGESTION:
-            return 'LOW'
-        else:
-            return 'VERY_LOW'
-    
     def _generate_recommendations(self, lane_results: List[Dict], priorities: List[Dict]) -> List[str]:
         """Generate actionable recommendations"""
         recommendations = []
@@ -287,9 +306,9 @@ class TrafficAnalyzer:
                 'lane_name': lane_name,
                 'rank': priority['rank'],
                 'green_time': green_times[lane_id],
-                'yellow_time': Config.YELLOW_TIME,
-                'all_red_time': Config.ALL_RED_TIME,
-                'total_phase_time': green_times[lane_id] + Config.YELLOW_TIME + Config.ALL_RED_TIME,
+                'yellow_time': self._yellow_time,
+                'all_red_time': self._all_red_time,
+                'total_phase_time': green_times[lane_id] + self._yellow_time + self._all_red_time,
                 'congestion_level': priority['congestion_level'],
                 'priority_score': priority['priority_score']
             }
@@ -2,13 +2,54 @@
 Utility functions for the traffic management system
 """
 import json
+import threading
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 from config import Config
 
+# Optional fast JSON encoder (C/Rust, numpy-aware); stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Congestion bar colors: a score reaching _BAR_THRESHOLDS[k] gets _BAR_COLORS[k + 1]
+_BAR_THRESHOLDS = np.array([Config.LOW_CONGESTION, Config.MEDIUM_CONGESTION, Config.HIGH_CONGESTION])
+_BAR_COLORS = np.array(['green', 'yellow', 'orange', 'red'])
+
+# ⚡ Long-lived Agg figures, one per chart type: built on first use and cleared between
+# renders instead of re-creating the figure/renderer through pyplot every call
+_chart_figures = {}
+_chart_figures_lock = threading.Lock()
+
+
+def _chart_figure(name: str, nrows: int, ncols: int, figsize):
+    """
+    Get the reusable figure for a chart type (clear its axes while holding the lock)
+    
+    Args:
+        name: Chart key
+        nrows, ncols: Subplot grid
+        figsize: Figure size in inches
+        
+    Returns:
+        tuple: (figure, axes array, lock to hold while drawing and saving)
+    """
+    with _chart_figures_lock:
+        entry = _chart_figures.get(name)
+        if entry is None:
+            fig = Figure(figsize=figsize)
+            FigureCanvasAgg(fig)  # Attaches itself as fig.canvas (no pyplot state involved)
+            axes = fig.subplots(nrows, ncols, squeeze=False).flatten()
+            entry = _chart_figures[name] = (fig, axes, threading.Lock())
+    
+    return entry
+
 
 def save_results_to_json(results: Dict, filename: str = None) -> str:
     """
@@ -26,6 +67,14 @@ def save_results_to_json(results: Dict, filename: str = None) -> str:
     
     filepath = Config.OUTPUT_DIR / filename
     
+    # ⚡ orjson encodes straight to UTF-8 bytes (numpy scalars/arrays and int keys included)
+    if orjson is not None:
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(
+                results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            ))
+        return str(filepath)
+    
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(results, f, indent=2, ensure_ascii=False)
     
@@ -53,11 +102,18 @@ def create_congestion_chart(lane_results: List[Dict], output_path: str = None):
     congestion_scores = [r['congestion_score'] for r in lane_results]
     total_vehicles = [r['total_vehicles'] for r in lane_results]
     
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    fig, (ax1, ax2), lock = _chart_figure('congestion', 1, 2, (14, 6))
+    with lock:
+        return _render_congestion_chart(fig, ax1, ax2, lane_names, congestion_scores, total_vehicles, output_path)
+
+
+def _render_congestion_chart(fig, ax1, ax2, lane_names, congestion_scores, total_vehicles, output_path):
+    """Draw and save the congestion chart on a reusable figure (caller holds its lock)"""
+    ax1.clear()
+    ax2.clear()
     
-    # Congestion scores
-    colors = ['red' if score >= 60 else 'orange' if score >= 35 else 'yellow' if score >= 15 else 'green' 
-              for score in congestion_scores]
+    # Congestion scores (color per lane from one vectorized threshold lookup)
+    colors = _BAR_COLORS[np.searchsorted(_BAR_THRESHOLDS, congestion_scores, side='right')].tolist()
     
     ax1.bar(lane_names, congestion_scores, color=colors, alpha=0.7)
     ax1.set_ylabel('Congestion Score', fontsize=12)
@@ -79,13 +135,12 @@ def create_congestion_chart(lane_results: List[Dict], output_path: str = None):
     for i, (name, count) in enumerate(zip(lane_names, total_vehicles)):
         ax2.text(i, count + max(total_vehicles)*0.02, str(count), ha='center', va='bottom', fontweight='bold')
     
-    plt.tight_layout()
+    fig.tight_layout()
     
     if output_path is None:
         output_path = Config.OUTPUT_DIR / f"congestion_chart_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
     
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.savefig(output_path, dpi=Config.CHART_DPI, bbox_inches='tight')
     
     return str(output_path)
 
@@ -101,8 +156,15 @@ def create_vehicle_distribution_chart(lane_results: List[Dict], output_path: str
     if not lane_results or len(lane_results) == 0:
         return None
     
-    fig, axes = plt.subplots(2, 2, figsize=(14, 12))
-    axes = axes.flatten()
+    fig, axes, lock = _chart_figure('vehicle_distribution', 2, 2, (14, 12))
+    with lock:
+        return _render_vehicle_distribution_chart(fig, axes, lane_results, output_path)
+
+
+def _render_vehicle_distribution_chart(fig, axes, lane_results, output_path):
+    """Draw and save the vehicle distribution chart on a reusable figure (caller holds its lock)"""
+    for ax in axes:
+        ax.clear()
     
     colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
     
@@ -140,14 +202,13 @@ def create_vehicle_distribution_chart(lane_results: List[Dict], output_path: str
             fontweight='bold'
         )
     
-    plt.suptitle('Vehicle Type Distribution by Lane', fontsize=16, fontweight='bold', y=0.98)
-    plt.tight_layout()
+    fig.suptitle('Vehicle Type Distribution by Lane', fontsize=16, fontweight='bold', y=0.98)
+    fig.tight_layout()
     
     if output_path is None:
         output_path = Config.OUTPUT_DIR / f"vehicle_distribution_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
     
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.savefig(output_path, dpi=Config.CHART_DPI, bbox_inches='tight')
     
     return str(output_path)
 
@@ -166,64 +227,56 @@ def generate_report(analysis_result: Dict, output_path: str = None) -> str:
     if output_path is None:
         output_path = Config.OUTPUT_DIR / f"traffic_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("="*80 + "\n")
-        f.write("          ADVANCED TRAFFIC MANAGEMENT SYSTEM - ANALYSIS REPORT\n")
-        f.write("="*80 + "\n\n")
+    stats = analysis_result.get('lane_statistics', {})
+    priorities = analysis_result.get('priority_ranking', [])
+    signals = analysis_result.get('signal_assignment', {})
+    recommendations = analysis_result.get('recommendations', [])
+    
+    # ⚡ Build the whole report in memory, then write it once
+    parts = [
+        "="*80 + "\n",
+        "          ADVANCED TRAFFIC MANAGEMENT SYSTEM - ANALYSIS REPORT\n",
+        "="*80 + "\n\n",
         
-        f.write(f"Report Generated: {analysis_result.get('timestamp', 'N/A')}\n")
-        f.write(f"Total Lanes Analyzed: {analysis_result.get('total_lanes', 0)}\n\n")
+        f"Report Generated: {analysis_result.get('timestamp', 'N/A')}\n",
+        f"Total Lanes Analyzed: {analysis_result.get('total_lanes', 0)}\n\n",
         
         # Lane Statistics
-        f.write("-"*80 + "\n")
-        f.write("LANE STATISTICS\n")
-        f.write("-"*80 + "\n\n")
-        
-        stats = analysis_result.get('lane_statistics', {})
-        f.write(f"Total Vehicles (All Lanes): {stats.get('total_vehicles_all_lanes', 0)}\n")
-        f.write(f"Average Congestion Score: {stats.get('average_congestion_score', 0):.2f}\n")
-        f.write(f"Most Congested Lane: {stats.get('most_congested_lane', 'N/A')}\n")
-        f.write(f"Least Congested Lane: {stats.get('least_congested_lane', 'N/A')}\n\n")
+        "-"*80 + "\nLANE STATISTICS\n" + "-"*80 + "\n\n",
+        f"Total Vehicles (All Lanes): {stats.get('total_vehicles_all_lanes', 0)}\n",
+        f"Average Congestion Score: {stats.get('average_congestion_score', 0):.2f}\n",
+        f"Most Congested Lane: {stats.get('most_congested_lane', 'N/A')}\n",
+        f"Least Congested Lane: {stats.get('least_congested_lane', 'N/A')}\n\n",
         
         # Priority Ranking
-        f.write("-"*80 + "\n")
-        f.write("PRIORITY RANKING\n")
-        f.write("-"*80 + "\n\n")
-        
-        priorities = analysis_result.get('priority_ranking', [])
-        for priority in priorities:
-            f.write(f"Rank {priority['rank']}: {priority['lane_name']}\n")
-            f.write(f"  Priority Score: {priority['priority_score']:.2f}\n")
-            f.write(f"  Congestion Level: {priority['congestion_level']}\n")
-            f.write(f"  Total Vehicles: {priority['total_vehicles']}\n")
-            f.write(f"  Max Vehicles in Frame: {priority['max_vehicles_in_frame']}\n")
-            f.write(f"  Heavy Vehicles: {priority['heavy_vehicles']}\n\n")
-        
-        # Signal Assignment
-        f.write("-"*80 + "\n")
-        f.write("SIGNAL ASSIGNMENT\n")
-        f.write("-"*80 + "\n\n")
-        
-        signals = analysis_result.get('signal_assignment', {})
-        for lane_id, signal in signals.items():
-            lane_name = Config.LANE_NAMES[lane_id] if lane_id < len(Config.LANE_NAMES) else f'Lane {lane_id}'
-            icon = '🟢' if signal == 'GREEN' else '🔴'
-            f.write(f"{icon} {lane_name}: {signal}\n")
-        
-        f.write("\n")
-        
-        # Recommendations
-        f.write("-"*80 + "\n")
-        f.write("RECOMMENDATIONS\n")
-        f.write("-"*80 + "\n\n")
-        
-        recommendations = analysis_result.get('recommendations', [])
-        for i, rec in enumerate(recommendations, 1):
-            f.write(f"{i}. {rec}\n")
-        
-        f.write("\n" + "="*80 + "\n")
-        f.write("                              END OF REPORT\n")
-        f.write("="*80 + "\n")
+        "-"*80 + "\nPRIORITY RANKING\n" + "-"*80 + "\n\n",
+    ]
+    parts.extend(
+        f"Rank {priority['rank']}: {priority['lane_name']}\n"
+        f"  Priority Score: {priority['priority_score']:.2f}\n"
+        f"  Congestion Level: {priority['congestion_level']}\n"
+        f"  Total Vehicles: {priority['total_vehicles']}\n"
+        f"  Max Vehicles in Frame: {priority['max_vehicles_in_frame']}\n"
+        f"  Heavy Vehicles: {priority['heavy_vehicles']}\n\n"
+        for priority in priorities
+    )
+    
+    # Signal Assignment
+    parts.append("-"*80 + "\nSIGNAL ASSIGNMENT\n" + "-"*80 + "\n\n")
+    lane_names = Config.LANE_NAMES
+    for lane_id, signal in signals.items():
+        lane_name = lane_names[lane_id] if lane_id < len(lane_names) else f'Lane {lane_id}'
+        icon = '🟢' if signal == 'GREEN' else '🔴'
+        parts.append(f"{icon} {lane_name}: {signal}\n")
+    parts.append("\n")
+    
+    # Recommendations
+    parts.append("-"*80 + "\nRECOMMENDATIONS\n" + "-"*80 + "\n\n")
+    parts.extend(f"{i}. {rec}\n" for i, rec in enumerate(recommendations, 1))
+    
+    parts.append("\n" + "="*80 + "\n                              END OF REPORT\n" + "="*80 + "\n")
+    
+    Path(output_path).write_text(''.join(parts), encoding='utf-8')
     
     return str(output_path)
 
@@ -0,0 +1,332 @@
+"""
+Video I/O helpers - hardware accelerated decode/encode with safe CPU fallbacks
+"""
+import os
+import queue
+import threading
+
+# FFmpeg capture options are read when a capture opens: auto thread count for decode
+os.environ.setdefault('OPENCV_FFMPEG_CAPTURE_OPTIONS', 'threads;0|fflags;nobuffer')
+
+import cv2
+from loguru import logger
+
+from config import Config
+
+# Optional PyAV (FFmpeg bindings) for multithreaded decode in the live loop
+try:
+    import av
+except ImportError:
+    av = None
+
+# Fully-buffered file sink: encoded packets reach disk in few large writes
+_SINK_BUFFER_BYTES = 4 * 1024 * 1024
+
+
+def cuda_available():
+    """Check whether a CUDA device is usable for hardware video encode
+
+    Returns:
+        bool: True if OpenCV or PyTorch can see a CUDA device
+    """
+    try:
+        if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+            return True
+    except (AttributeError, cv2.error):
+        pass  # OpenCV built without CUDA
+
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except ImportError:
+        return False
+
+
+def open_capture(video_path):
+    """Open a video for reading, preferring hardware (NVDEC/VAAPI/D3D11) decode
+
+    Args:
+        video_path: Input video file
+
+    Returns:
+        cv2.VideoCapture: Capture object (check isOpened())
+    """
+    video_path = str(video_path)
+
+    # 🚀 GPU DECODE: FFmpeg backend with OpenCV's hardware acceleration (OpenCV >= 4.5.2)
+    if Config.USE_HW_CODEC:
+        try:
+            cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [
+                cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY,
+                cv2.CAP_PROP_HW_DEVICE, Config.HW_DEVICE
+            ])
+            if cap.isOpened():
+                if cap.get(cv2.CAP_PROP_HW_ACCELERATION) != cv2.VIDEO_ACCELERATION_NONE:
+                    logger.info(f"🎞️ Hardware decode: {video_path}")
+                return cap
+            cap.release()
+        except (AttributeError, TypeError, cv2.error):
+            pass  # Older OpenCV without the hw-acceleration open params
+
+    # FFmpeg software decode beats the default backend (MSMF on Windows)
+    cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG)
+    if cap.isOpened():
+        return cap
+    cap.release()
+    return cv2.VideoCapture(video_path)
+
+
+class AVCapture:
+    """Minimal cv2.VideoCapture-compatible reader backed by PyAV
+
+    grab() decodes without the YUV->BGR conversion, so skipped frames only pay for
+    the codec; retrieve() converts the last grabbed frame on demand.
+    """
+
+    def __init__(self, video_path):
+        self._container = av.open(str(video_path))
+        self._stream = self._container.streams.video[0]
+        self._stream.thread_type = 'AUTO'  # FFmpeg frame + slice threading
+        self._frames = self._container.decode(self._stream)
+        self._frame = None
+
+    def isOpened(self):
+        return self._container is not None
+
+    def grab(self):
+        try:
+            self._frame = next(self._frames)
+            return True
+        except (StopIteration, av.error.FFmpegError):
+            self._frame = None
+            return False
+
+    def retrieve(self):
+        if self._frame is None:
+            return False, None
+        return True, self._frame.to_ndarray(format='bgr24')
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def set(self, prop, value):
+        """Only rewinding (CAP_PROP_POS_FRAMES = 0) is supported"""
+        if prop == cv2.CAP_PROP_POS_FRAMES and value == 0:
+            self._container.seek(0)
+            self._frames = self._container.decode(self._stream)
+            return True
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self._stream.average_rate or 0)
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self._stream.codec_context.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self._stream.codec_context.height
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self._stream.frames
+        return 0
+
+    def release(self):
+        if self._container is not None:
+            self._container.close()
+            self._container = None
+
+
+class FrameProducer:
+    """Decode a capture on a background thread into a bounded FIFO of frames
+
+    Unlike a latest-frame mailbox, every (sampled) frame is delivered in order,
+    so it suits players and offline loops; the consumer only waits when it has
+    caught up with the decoder.
+    """
+
+    def __init__(self, cap, sample_every: int = 1, maxsize: int = 128):
+        """
+        Args:
+            cap: Opened capture, owned (and released) by the producer
+            sample_every: Queue 1 of every N frames; the others are only grab()-bed
+            maxsize: Frames buffered ahead of the consumer
+        """
+        self.cap = cap
+        self.sample_every = max(1, sample_every)
+        self.q = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._eof = False
+
+    def start(self):
+        """Start decoding; returns self for chaining"""
+        self._thread.start()
+        return self
+
+    def read(self):
+        """Next frame as (ret, frame), cv2.VideoCapture.read()-style; (False, None) at EOF"""
+        if self._eof:
+            return False, None
+        ret, frame = self.q.get()
+        if not ret:
+            self._eof = True
+        return ret, frame
+
+    def stop(self):
+        """Stop the decoder, unblock it if the queue is full, and release the capture"""
+        self._stop.set()
+        while self._thread.is_alive():
+            try:
+                self.q.get_nowait()  # Make room so a blocked put() can observe the stop flag
+            except queue.Empty:
+                pass
+            self._thread.join(timeout=0.05)
+
+    def _put(self, item):
+        """Blocking put that gives up when stop() is called"""
+        while not self._stop.is_set():
+            try:
+                self.q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                for _ in range(self.sample_every - 1):
+                    if not self.cap.grab():
+                        break
+                ret, frame = self.cap.read()
+                if not ret or not self._put((True, frame)):
+                    break
+        finally:
+            self.cap.release()
+            self._put((False, None))  # EOF marker (skipped once stopped)
+
+
+class FrameWriter:
+    """Encode frames on a background thread fed by a bounded FIFO
+
+    Mirror image of FrameProducer: write() only enqueues, so an encoder flush
+    overlaps with detecting the next frame instead of stalling the loop.
+    """
+
+    def __init__(self, writer, maxsize: int = 64):
+        """
+        Args:
+            writer: Opened cv2.VideoWriter, owned (and released) by the FrameWriter
+            maxsize: Frames buffered ahead of the encoder
+        """
+        self.writer = writer
+        self.q = queue.Queue(maxsize=maxsize)
+        self._error = None  # Set by the encoder thread if writer.write() raised
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start encoding; returns self for chaining"""
+        self._thread.start()
+        return self
+
+    def write(self, frame):
+        """Queue a frame for encoding (the caller must not modify it afterwards)
+
+        Raises:
+            Exception: The encoder's error, if an earlier frame failed to write
+        """
+        if self._error is not None:
+            raise self._error
+        self.q.put(frame)
+
+    def release(self):
+        """Flush the queued frames, stop the thread and release the writer
+
+        Raises:
+            Exception: The encoder's error, if any frame failed to write
+        """
+        self.q.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self):
+        try:
+            while True:
+                frame = self.q.get()
+                if frame is None:
+                    break
+                if self._error is not None:
+                    continue  # Keep draining so write() never blocks on a full queue
+                try:
+                    self.writer.write(frame)
+                except Exception as e:
+                    logger.error(f"❌ Video encoder failed: {e}")
+                    self._error = e
+        finally:
+            self.writer.release()
+
+
+def open_live_capture(video_path):
+    """Open a looping live-lane source: PyAV when installed, else OpenCV
+
+    Args:
+        video_path: Input video file
+
+    Returns:
+        AVCapture or cv2.VideoCapture
+    """
+    if av is not None:
+        try:
+            return AVCapture(video_path)
+        except Exception as e:
+            logger.warning(f"⚠️ PyAV could not open {video_path}: {e}. Using OpenCV.")
+    return open_capture(video_path)
+
+
+def get_video_info(cap):
+    """Read stream metadata once at open time
+
+    Args:
+        cap: Opened cv2.VideoCapture
+
+    Returns:
+        tuple: (fps, width, height, total_frames)
+    """
+    return (
+        int(cap.get(cv2.CAP_PROP_FPS)),
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    )
+
+
+def create_video_writer(output_path, fps, frame_size):
+    """Create a VideoWriter, preferring NVENC (GStreamer) over CPU mp4v
+
+    Args:
+        output_path: Destination .mp4 file
+        fps: Output frame rate
+        frame_size: (width, height) of the BGR frames that will be written
+
+    Returns:
+        cv2.VideoWriter: Opened writer
+    """
+    output_path = str(output_path)
+
+    # 🚀 GPU ENCODE: nvh264enc moves H.264 encoding onto the NVENC engine
+    if Config.USE_HW_CODEC and cuda_available():
+        pipeline = (
+            'appsrc ! videoconvert ! nvh264enc ! h264parse ! '
+            f'mp4mux ! filesink location="{output_path}" '
+            f'buffer-mode=full buffer-size={_SINK_BUFFER_BYTES}'
+        )
+        writer = cv2.VideoWriter(pipeline, cv2.CAP_GSTREAMER, 0, fps, frame_size, True)
+        if writer.isOpened():
+            logger.info(f"🎞️ NVENC writer: {output_path}")
+            return writer
+        writer.release()
+        logger.warning("⚠️ GStreamer NVENC pipeline unavailable, falling back to mp4v")
+
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    return cv2.VideoWriter(output_path, fourcc, fps, frame_size)
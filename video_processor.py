@@ -9,6 +9,7 @@ from typing import List, Dict
 from loguru import logger
 from config import Config
 from vehicle_detector import VehicleDetector
+from video_io import open_capture, get_video_info, create_video_writer, FrameProducer, FrameWriter
 
 
 class VideoProcessor:
@@ -44,42 +45,45 @@ class VideoProcessor:
         """
         logger.info(f"Processing video: {video_path}")
         
-        cap = cv2.VideoCapture(video_path)
+        cap = open_capture(video_path)
         
         if not cap.isOpened():
             logger.error(f"Failed to open video: {video_path}")
             return None
         
         # Video properties
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps, width, height, total_frames = get_video_info(cap)
         
         # Setup output video writer
         if output_path is None:
             output_path = Config.OUTPUT_DIR / f"lane_{lane_id}_annotated.mp4"
         
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
+        # Only detected frames are written, so the output runs at the sampled
+        # rate and keeps the source duration
+        out_fps = max(1, round(fps / Config.DETECTION_INTERVAL))
         
-        frame_idx = 0
+        # ⚡ Decode, detect and encode overlap: the producer and writer threads keep
+        # FFmpeg busy while this thread runs inference
+        out = FrameWriter(create_video_writer(output_path, out_fps, (width, height))).start()
+        producer = FrameProducer(cap, sample_every=Config.DETECTION_INTERVAL, maxsize=8).start()
+        
+        frame_idx = Config.DETECTION_INTERVAL - 1  # Source index of the first sampled frame
         detections_per_frame = []
         
         logger.info(f"Processing {total_frames} frames at {fps} FPS")
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Detect vehicles
-            if frame_idx % Config.DETECTION_INTERVAL == 0:
+        try:
+            while True:
+                ret, frame = producer.read()
+                if not ret:
+                    break
+                
+                # Detect vehicles
                 detections = self.detector.detect_vehicles(frame)
                 detections_per_frame.append(len(detections))
                 
                 # Draw detections
-                annotated_frame = self.detector.draw_detections(frame, detections)
+                annotated_frame = self.detector.draw_detections(frame, detections, out=frame)
                 
                 # Add info overlay
                 annotated_frame = self._add_info_overlay(
@@ -89,26 +93,24 @@ class VideoProcessor:
                     total_frames,
                     detections
                 )
-            else:
-                annotated_frame = frame.copy()
-            
-            # Write frame
-            out.write(annotated_frame)
-            
-            # Show preview
-            if show_preview:
-                cv2.imshow(f'Lane {lane_id} - Processing', annotated_frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
-            
-            frame_idx += 1
-            
-            if frame_idx % 100 == 0:
-                progress = (frame_idx / total_frames) * 100
-                logger.debug(f"Progress: {progress:.1f}%")
-        
-        cap.release()
-        out.release()
+                
+                # Write frame
+                out.write(annotated_frame)
+                
+                # Show preview
+                if show_preview:
+                    cv2.imshow(f'Lane {lane_id} - Processing', annotated_frame)
+                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                        break
+                
+                frame_idx += Config.DETECTION_INTERVAL
+                
+                if len(detections_per_frame) % 50 == 0:
+                    progress = (frame_idx / total_frames) * 100
+                    logger.debug(f"Progress: {progress:.1f}%")
+        finally:
+            producer.stop()
+            out.release()
         
         if show_preview:
             cv2.destroyAllWindows()
@@ -130,12 +132,11 @@ class VideoProcessor:
         total_frames: int,
         detections: List[Dict]
     ) -> np.ndarray:
-        """Add informational overlay to frame"""
-        overlay = frame.copy()
-        
-        # Semi-transparent background for text
-        cv2.rectangle(overlay, (10, 10), (400, 150), (0, 0, 0), -1)
-        frame = cv2.addWeighted(overlay, 0.6, frame, 0.4, 0)
+        """Add informational overlay to frame (drawn in place)"""
+        # Semi-transparent background for text: 60% black over the box only,
+        # blended in place instead of copying and blending the whole frame
+        roi = frame[10:151, 10:401]
+        cv2.addWeighted(roi, 0.4, roi, 0, 0, dst=roi)
         
         # Lane info
         lane_name = Config.LANE_NAMES[lane_id]
@@ -204,11 +205,15 @@ class VideoProcessor:
         if output_path is None:
             output_path = Config.OUTPUT_DIR / "comparison_all_lanes.mp4"
         
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(output_path), fourcc, fps, (out_width, out_height))
+        # NVENC when available, mp4v otherwise
+        out = create_video_writer(output_path, fps, (out_width, out_height))
         
         logger.info("Creating comparison video...")
         
+        # ⚡ One canvas for the whole run; tiles are views, so no hstack/vstack copies per frame
+        grid = np.empty((out_height, out_width, 3), dtype=np.uint8)
+        tiles = [grid[:height, :width], grid[:height, width:], grid[height:, :width], grid[height:, width:]]
+        
         frame_idx = 0
         
         while True:
@@ -226,22 +231,16 @@ class VideoProcessor:
             if None in frames:
                 break
             
-            # Process frames
-            processed_frames = []
-            for i, frame in enumerate(frames):
-                detections = self.detector.detect_vehicles(frame)
-                annotated = self.detector.draw_detections(frame, detections)
+            # 🚀 One batched forward pass for all 4 lanes instead of 4 serialized calls
+            lane_detections = self.detector.detect_vehicles_batch(frames)
+            
+            # Annotate each lane straight into its tile of the 2x2 grid
+            for tile, frame, detections, lane_name in zip(tiles, frames, lane_detections, Config.LANE_NAMES):
+                self.detector.draw_detections(frame, detections, out=tile)
                 
                 # Add lane label
-                cv2.putText(annotated, Config.LANE_NAMES[i], (20, 40),
+                cv2.putText(tile, lane_name, (20, 40),
                            cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 255, 0), 3)
-                
-                processed_frames.append(annotated)
-            
-            # Create 2x2 grid
-            top_row = np.hstack([processed_frames[0], processed_frames[1]])
-            bottom_row = np.hstack([processed_frames[2], processed_frames[3]])
-            grid = np.vstack([top_row, bottom_row])
             
             out.write(grid)
             